@@ -2,17 +2,38 @@
 # SPDX-License-Identifier: Apache-2.0
 import hashlib
 import os
+import pickle
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple, Union
+from weakref import WeakKeyDictionary
 
 import ollama
-from docutils.nodes import Text, admonition, inline, paragraph
+from docutils.nodes import (
+    Element,
+    General,
+    Inline,
+    Invisible,
+    Node,
+    Text,
+    TextElement,
+    admonition,
+    document,
+    inline,
+    make_id,
+    paragraph,
+    title,
+)
+from docutils.parsers.rst import Parser as RSTParser
 from docutils.parsers.rst.directives.admonitions import BaseAdmonition
-from langchain_ollama import ChatOllama
 from sphinx.addnodes import pending_xref
 from sphinx.application import Sphinx
 from sphinx.errors import ExtensionError
+from sphinx.transforms import SphinxSmartQuotes
 from sphinx.util import logging
-from sphinx.util.docutils import SphinxDirective
+from sphinx.util.docutils import SphinxDirective, new_document
 
 from .version import __version__
 
@@ -20,6 +41,34 @@ logger = logging.getLogger(__name__)
 DEFAULT_MODEL = "llama3.2:3b"
 SYSTEM_PROMPT = "Keep responses concise and focused, avoiding unnecessary elaboration or additional context unless explicitly requested. Do not use bullet points, lists, or nested structures unless specifically asked. If a response requires further detail, prioritize the most relevant information and conclude promptly. Avoid apologies or mentions of limitations; simply deliver the most direct and straightforward answer."
 OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+DEFAULT_PARALLEL = 4
+MAX_INPUT_CHARS = 6000
+TRUNCATION_MARKER = "\n...\n"
+CACHE_FILENAME = "sphinx_llm_cache.pickle"
+DEFERRED_TITLE = "See also:"
+
+
+class docref_summary(General, Element):
+    """Placeholder for a summary which is generated after all documents are read."""
+
+
+class docref_title(Inline, Element):
+    """Placeholder for the title of a document which hadn't been read yet."""
+
+
+class PendingSummary(NamedTuple):
+    """A summary which needs generating and writing back to its source file."""
+
+    docname: str
+    key: Union[str, None]
+    doc_contents: Union[str, None]
+    model: str
+    source: str
+    lineno: int
+    content_lines: list[int]
+    hash_line: Union[int, None]
+    target: str
+    stored_hash: Union[str, None]
 
 
 class Docref(BaseAdmonition, SphinxDirective):
@@ -30,24 +79,51 @@ class Docref(BaseAdmonition, SphinxDirective):
     def run(self):
         # Get the document name from the directive arguments
         [doc_name] = self.arguments
-        doc_title = "See also: "
-        doc_title += (
-            self.state.document.settings.env.app.builder.env.get_doctree(doc_name)
-            .traverse(lambda n: n.tagname == "title")[0]
-            .astext()
-        )
-        self.arguments = [doc_title]
+        model = self.resolve_model()
 
-        # Generate a summary of the document contents and replace the directive content with it
-        hash, summary = self.generate_summary(doc_name)
-        self.update_content(hash, summary)
+        # The referenced document may not have been read yet, either because it
+        # comes later in this build or it's in another parallel reader. Then
+        # its title and summary are filled in once all documents have been read.
+        deferred = doc_name in getattr(self.env, "sphinx_llm_unread", ())
+        if deferred:
+            self.arguments = [DEFERRED_TITLE]
+            key, summary = None, None
+            self.queue_summary(None, None, model, doc_name)
+        else:
+            doctree, _ = get_doctree(self.env, doc_name)
+            doc_title = "See also: "
+            doc_title += next(doctree.findall(title)).astext()
+            self.arguments = [doc_title]
+
+            # Use the summary in the source if it is up to date, otherwise queue it
+            key, summary = self.generate_summary(doc_name, model)
 
         # Specify that this page should be rebuilt when the referenced document changes
-        self.state.document.settings.env.note_dependency(doc_name)
+        self.note_docref_dependency(doc_name)
 
         # Run the base admonition directive
         nodes = super().run()
 
+        # Mark the admonition so it's left out of the summaries of this page
+        nodes[0]["classes"].append("docref")
+
+        # Swap the out of date content for a placeholder which is filled in once
+        # all pending summaries have been generated in one batch
+        if deferred:
+            nodes[0][0] += docref_title(target=doc_name)
+            summary_node = docref_summary(
+                key=None,
+                target=doc_name,
+                model=model,
+                hash=self.options.get("hash"),
+                content="\n".join(self.content.data),
+            )
+            del nodes[0][1:]
+            nodes[0] += summary_node
+        elif summary is None:
+            del nodes[0][1:]
+            nodes[0] += docref_summary(key=key)
+
         # Add a link to the document
         custom_xref = pending_xref(
             reftype="doc",
@@ -66,80 +142,360 @@ class Docref(BaseAdmonition, SphinxDirective):
         nodes[0] += wrapper
         return nodes
 
-    def generate_summary(self, doc_name: str) -> str:
-        # Get the document contents
-        doc_contents = self.state.document.settings.env.app.builder.env.get_doctree(
-            doc_name
-        ).astext()
-
-        # Check the cached summary
-        doc_hash = hashlib.md5(doc_contents.encode()).hexdigest()
-        if "hash" in self.options and self.options["hash"] == doc_hash:
-            return doc_hash, "\n".join(self.content.data)
-        if hasattr(
-            self.config, "sphinx_llm_options"
-        ) and self.config.sphinx_llm_options.get("warn_on_cache_miss", True):
-            logger.warning(
-                f"LLM summary is out of date for document '{doc_name}', regenerating summary"
-            )
+    def note_docref_dependency(self, doc_name: str):
+        """Register the referenced document as a dependency once per page."""
+        if not hasattr(self.env, "sphinx_llm_notedeps"):
+            self.env.sphinx_llm_notedeps = {}
+        noted = self.env.sphinx_llm_notedeps.setdefault(self.env.docname, set())
+        if doc_name in noted:
+            return
+        noted.add(doc_name)
+        self.env.note_dependency(self.env.doc2path(doc_name))
 
-        # Generate a summary using the LLM
+    def resolve_model(self) -> str:
+        """Return the model set on the directive, in the config or the default."""
         if "model" in self.options and self.options["model"]:
-            model = self.options["model"]
+            return self.options["model"]
         elif hasattr(self.config, "sphinx_llm_options"):
-            model = self.config.sphinx_llm_options.get("model", DEFAULT_MODEL)
-        else:
-            model = DEFAULT_MODEL
-        self.ensure_model(model)
-        llm_client = ChatOllama(
-            base_url=OLLAMA_BASE_URL,
-            model=model,
-            temperature=0,
-        )
-        doc_summary = llm_client.invoke(
-            [
-                ("system", SYSTEM_PROMPT),
-                (
-                    "human",
-                    doc_contents
-                    + "\n\nHere's a concise one-sentence summary of the above:",
-                ),
-            ]
-        ).content
+            return self.config.sphinx_llm_options.get("model", DEFAULT_MODEL)
+        return DEFAULT_MODEL
 
-        return doc_hash, doc_summary
+    def generate_summary(
+        self, doc_name: str, model: str
+    ) -> tuple[str, Union[str, None]]:
+        """Return the summary, or the cache key and ``None`` if it needs generating."""
+        # Get the document contents
+        _, doc_contents = get_doctree(self.env, doc_name)
 
-    def ensure_model(self, model: str):
-        # Check if the model is already loaded
-        ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-        try:
-            ollama_client.ps()
-            try:
-                ollama_client.show(model)
-                return
-            except ollama.ResponseError:
-                logger.info(f"Model {model} not found, loading...")
-                ollama_client.pull(model)
-                logger.info(f"Pulled model {model}")
-        except Exception as e:
-            raise ExtensionError(
-                f"Failed to connect to ollama at {OLLAMA_BASE_URL}", e, "sphinx-llm"
-            ) from e
-
-    def update_content(self, hash: str, summary: str):
-        self.content.data = summary.splitlines()
-
-        # Update the source file with the new summary
+        # Check the summary stored in the source, the hash covers the model too
+        # so changing models regenerates the summary
+        key = cache_key(model, doc_contents)
+        if "hash" in self.options and self.options["hash"] == key:
+            return key, "\n".join(self.content.data)
+
+        warn_out_of_date(self.env, key, doc_name)
+
+        # Queue the source update, and generation if the summary isn't in the
+        # on-disk cache, to happen once all documents have been read
+        self.queue_summary(key, doc_contents, model, doc_name)
+
+        return key, None
+
+    def queue_summary(
+        self,
+        key: Union[str, None],
+        doc_contents: Union[str, None],
+        model: str,
+        doc_name: str,
+    ):
         source_file = Path(self.state.document.current_source)
         # TODO add support for myst and other markdown formats
         if source_file.suffix != ".rst":
             raise ValueError(f"Source file {source_file} is not an RST file")
-        source = source_file.read_text().splitlines()
-        original_source = source.copy()
+
+        # Record where the summary and hash live in the source (rst specific for now)
         start_line_idx = self.lineno - 1
+        hash_line = None
+        for i, line in enumerate(self.content.parent.data):
+            if ":hash:" in line:
+                hash_line = start_line_idx + i
+                break
+
+        # Without parallel reading the summary can start generating straight away
+        # while the rest of the documents are read. Parallel readers are separate
+        # processes so their requests are left for flush_summaries to submit.
+        summarizer = _summarizers[self.env]
+        if (
+            key is not None
+            and not getattr(self.env, "sphinx_llm_read_parallel", False)
+            and key not in summarizer.cache
+        ):
+            summarizer.submit(key, model, doc_contents)
+
+        if not hasattr(self.env, "sphinx_llm_pending"):
+            self.env.sphinx_llm_pending = []
+        self.env.sphinx_llm_pending.append(
+            PendingSummary(
+                docname=self.env.docname,
+                key=key,
+                doc_contents=doc_contents,
+                model=model,
+                source=str(source_file),
+                lineno=start_line_idx,
+                content_lines=[line for (_, line) in self.content.items],
+                hash_line=hash_line,
+                target=doc_name,
+                stored_hash=self.options.get("hash"),
+            )
+        )
+
+
+def warn_out_of_date(env, key: str, doc_name: str):
+    """Warn that a summary is being regenerated unless it's already cached."""
+    config = env.config
+    if (
+        key not in _summarizers[env].cache
+        and hasattr(config, "sphinx_llm_options")
+        and config.sphinx_llm_options.get("warn_on_cache_miss", True)
+    ):
+        logger.warning(
+            f"LLM summary is out of date for document '{doc_name}', regenerating summary"
+        )
+
+
+def get_doctree(env, doc_name: str) -> tuple[document, str]:
+    """Return a doctree and its text, unpickling each document once per build."""
+    cache = _doctree_caches.setdefault(env, {})
+    if doc_name not in cache:
+        doctree = env.get_doctree(doc_name)
+        max_chars = env.config.sphinx_llm_options.get(
+            "max_input_chars", MAX_INPUT_CHARS
+        )
+        cache[doc_name] = doctree, extract_summary_text(doctree, max_chars)
+    return cache[doc_name]
+
+
+def is_text_block(node) -> bool:
+    return (
+        isinstance(node, TextElement)
+        and not isinstance(node, (Inline, Invisible))
+        and not in_docref(node)
+    )
+
+
+def in_docref(node) -> bool:
+    """Whether a node is part of a docref, whose text depends on other documents."""
+    while node is not None:
+        if isinstance(node, admonition) and "docref" in node["classes"]:
+            return True
+        node = node.parent
+    return False
+
+
+def extract_summary_text(doctree: document, max_chars: int = MAX_INPUT_CHARS) -> str:
+    """Return the text of a doctree for summarising, at most ``max_chars`` long.
+
+    Walks the visible block level text (titles, paragraphs, literal blocks etc)
+    rather than calling ``astext()`` so large documents are never fully joined
+    into one string. Documents over the limit are cut down to their head and
+    tail, which keeps the prompt (and so the model's prefill time) bounded while
+    still including the conclusion. The result is used both as the LLM prompt
+    and as the hash input so the hash reflects what the summary was generated from.
+    """
+    budget = max(0, max_chars - len(TRUNCATION_MARKER))
+    head_chars = budget // 2
+    tail_chars = budget - head_chars
+    head, head_length = [], 0
+    tail, tail_length = deque(), 0
+    total_length = 0
+    dropped = False
+    for node in doctree.findall(is_text_block):
+        text = node.astext()
+        # Lengths include a separator after each block, hence the extra 2
+        total_length += len(text) + 2
+        if head_length < head_chars + 2:
+            head.append(text)
+            head_length += len(text) + 2
+            continue
+        tail.append(text)
+        tail_length += len(text) + 2
+        # Once the text is too long only keep as many trailing blocks as are
+        # needed to fill the tail
+        while (
+            total_length - 2 > max_chars
+            and tail_length - len(tail[0]) - 4 >= tail_chars
+        ):
+            tail_length -= len(tail.popleft()) + 2
+            dropped = True
+
+    text = "\n\n".join([*head, *tail])
+    if total_length - 2 <= max_chars:
+        return text
+    # While the head and tail still meet, the tail can run back into the blocks
+    # of the head, otherwise the kept trailing blocks are long enough to fill it
+    tail_text = "\n\n".join(tail) if dropped else text
+    tail_text = tail_text[-tail_chars:] if tail_chars else ""
+    truncated = text[:head_chars] + TRUNCATION_MARKER + tail_text
+    # Limits shorter than the marker itself leave no room for any text
+    return truncated[:max_chars]
+
+
+# Doctrees are cached per environment but kept off the environment itself, so
+# they aren't pickled with it or sent back from parallel readers
+_doctree_caches: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def reset_doctree_cache(app: Sphinx, *_):
+    """Drop cached doctrees so they are neither reused across builds nor kept in memory."""
+    _doctree_caches[app.env] = {}
+
+
+def note_unread_docs(app: Sphinx, env, docnames: list):
+    """Remember which documents are about to be (re-)read, and whether in parallel."""
+    env.sphinx_llm_unread = set(docnames)
+    env.sphinx_llm_read_parallel = app.parallel > 1
+
+
+def purge_doctree(app: Sphinx, doctree: document):
+    """Forget a cached doctree once its document has been re-read."""
+    _doctree_caches.get(app.env, {}).pop(app.env.docname, None)
+    getattr(app.env, "sphinx_llm_unread", set()).discard(app.env.docname)
 
-        # Figure out which lines to replace and the indent level
-        lines = [line for (_, line) in self.content.items]
+
+def cache_key(model: str, doc_contents: str) -> str:
+    """Key summaries on the model as well as the contents so model changes invalidate them."""
+    return hashlib.blake2b(
+        f"{model}:{doc_contents}".encode(), digest_size=16
+    ).hexdigest()
+
+
+class Summarizer:
+    """The Ollama client, thread pool and generated summaries of one Sphinx app."""
+
+    def __init__(self, max_workers: int, cache: dict[str, str]):
+        self.client = ollama.Client(host=OLLAMA_BASE_URL)
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sphinx-llm"
+        )
+        # Summaries are keyed on the model and contents, and only updated by
+        # the main thread once each batch has been generated
+        self.cache = cache
+        self.ready_models: set[str] = set()
+        self.ready_models_lock = threading.Lock()
+        self.available_models: set[str] = set()
+        self.in_flight: dict[str, Future] = {}
+        self.in_flight_lock = threading.Lock()
+
+    def ensure_model(self, model: str):
+        # Only one thread needs to check, pull or warm up a model
+        with self.ready_models_lock:
+            if model in self.ready_models:
+                return
+
+            # Check if the model has already been pulled, listing the local models
+            # once rather than asking Ollama about each model in turn
+            try:
+                if not self.available_models:
+                    self.available_models.update(
+                        m.model for m in self.client.list().models
+                    )
+                if not {model, f"{model}:latest"} & self.available_models:
+                    logger.info(f"Model {model} not found, loading...")
+                    self.client.pull(model)
+                    self.available_models.add(model)
+                    logger.info(f"Pulled model {model}")
+
+                # An empty prompt loads the weights into memory so the first summary
+                # doesn't pay the cold start
+                self.client.generate(model=model, prompt="")
+            except Exception as e:
+                raise ExtensionError(
+                    f"Failed to connect to ollama at {OLLAMA_BASE_URL}", e, "sphinx-llm"
+                ) from e
+            self.ready_models.add(model)
+
+    def invoke_llm(self, model: str, doc_contents: str) -> str:
+        """Generate a one sentence summary of ``doc_contents``."""
+        # Stream the response, the non-streaming endpoint can stall for minutes
+        # on some versions of Ollama before returning anything
+        chunks = self.client.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": doc_contents
+                    + "\n\nHere's a concise one-sentence summary of the above:",
+                },
+            ],
+            options={"temperature": 0},
+            stream=True,
+        )
+        return "".join(chunk.message.content or "" for chunk in chunks)
+
+    def summarize(self, model: str, doc_contents: str) -> str:
+        """Make sure ``model`` is available then summarise ``doc_contents`` with it."""
+        self.ensure_model(model)
+        return self.invoke_llm(model, doc_contents)
+
+    def submit(self, key: str, model: str, doc_contents: str) -> Future:
+        """Start generating a summary, sharing the request with identical ones in flight."""
+        with self.in_flight_lock:
+            if key not in self.in_flight:
+                self.in_flight[key] = self.pool.submit(
+                    self.summarize, model, doc_contents
+                )
+            return self.in_flight[key]
+
+
+# Like the doctrees, each app's summarizer is kept off its environment since
+# neither the client nor the pool can be pickled
+_summarizers: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def parallel_requests(config) -> int:
+    """Return how many summaries to generate at once.
+
+    This is ``sphinx_llm_options["parallel"]``, falling back to the
+    ``SPHINX_LLM_PARALLEL`` environment variable and then ``DEFAULT_PARALLEL``.
+    """
+    value = config.sphinx_llm_options.get(
+        "parallel", os.environ.get("SPHINX_LLM_PARALLEL", DEFAULT_PARALLEL)
+    )
+    try:
+        parallel = int(value)
+    except (TypeError, ValueError):
+        parallel = 0
+    if parallel < 1:
+        logger.warning(
+            f"Invalid number of parallel LLM requests {value!r}, "
+            f"using {DEFAULT_PARALLEL}"
+        )
+        return DEFAULT_PARALLEL
+    return parallel
+
+
+def init_summarizer(app: Sphinx):
+    """Create the summarizer for this build, with the summaries of previous builds."""
+    _summarizers[app.env] = Summarizer(parallel_requests(app.config), load_cache(app))
+
+
+def shutdown_summarizer(app: Sphinx, exception: Union[Exception, None]):
+    """Stop the summarizer's threads once the build has finished."""
+    summarizer = _summarizers.get(app.env)
+    if summarizer is not None:
+        summarizer.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_cache(app: Sphinx) -> dict[str, str]:
+    """Load summaries generated by previous builds from the doctree directory."""
+    try:
+        with open(Path(app.doctreedir) / CACHE_FILENAME, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(app: Sphinx):
+    """Persist generated summaries so rebuilds don't need to call the LLM again."""
+    try:
+        with open(Path(app.doctreedir) / CACHE_FILENAME, "wb") as f:
+            pickle.dump(_summarizers[app.env].cache, f, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f"Failed to write LLM summary cache: {e}")
+
+
+def update_source(source_file: Path, pending: list[PendingSummary], summaries: dict):
+    """Write generated summaries and hashes back into an RST source file."""
+    source = source_file.read_text().splitlines()
+    original_source = source.copy()
+
+    # Work from the bottom of the file up so earlier line numbers stay valid
+    for item in sorted(pending, key=lambda p: p.lineno, reverse=True):
+        summary = summaries[item.key]
+        lines = item.content_lines
+
+        # Figure out the indent level from the existing content
         indent = len(source[lines[0]]) - len(source[lines[0]].lstrip())
 
         # Remove original lines from the source
@@ -150,22 +506,147 @@ class Docref(BaseAdmonition, SphinxDirective):
         for line in reversed(summary.splitlines()):
             source.insert(lines[0], " " * indent + line)
 
-        # Update the hash (rst specific for now)
-        for i, line in enumerate(self.content.parent.data):
-            if ":hash:" in line:
-                source[start_line_idx + i] = " " * indent + f":hash: {hash}"
-                break
+        # Update the hash
+        if item.hash_line is not None:
+            source[item.hash_line] = " " * indent + f":hash: {item.key}"
         else:
-            source.insert(start_line_idx + 1, " " * indent + f":hash: {hash}")
+            source.insert(item.lineno + 1, " " * indent + f":hash: {item.key}")
+
+    # Only write if we are making changes
+    if source != original_source:
+        source_file.write_text("\n".join(source))
+
+
+def purge_pending(app: Sphinx, env, docname: str):
+    """Drop pending summaries and dependencies noted by a document being re-read."""
+    if hasattr(env, "sphinx_llm_pending"):
+        env.sphinx_llm_pending = [
+            p for p in env.sphinx_llm_pending if p.docname != docname
+        ]
+    if hasattr(env, "sphinx_llm_notedeps"):
+        env.sphinx_llm_notedeps.pop(docname, None)
+
+
+def merge_pending(app: Sphinx, env, docnames: set, other):
+    """Collect pending summaries and dependencies from parallel reader processes."""
+    if not hasattr(env, "sphinx_llm_pending"):
+        env.sphinx_llm_pending = []
+    # Readers are forked from the main process so only take what they added
+    env.sphinx_llm_pending.extend(
+        p for p in getattr(other, "sphinx_llm_pending", []) if p.docname in docnames
+    )
+    if not hasattr(env, "sphinx_llm_notedeps"):
+        env.sphinx_llm_notedeps = {}
+    for docname, noted in getattr(other, "sphinx_llm_notedeps", {}).items():
+        if docname in docnames:
+            env.sphinx_llm_notedeps[docname] = noted
+
+
+def resolve_pending(env, item: PendingSummary) -> Union[PendingSummary, None]:
+    """Fill in the contents of a deferred summary, or drop it if it's up to date."""
+    if item.doc_contents is not None:
+        return item
+    _, doc_contents = get_doctree(env, item.target)
+    key = cache_key(item.model, doc_contents)
+    if key == item.stored_hash:
+        return None
+    warn_out_of_date(env, key, item.target)
+    return item._replace(key=key, doc_contents=doc_contents)
+
+
+def flush_summaries(app: Sphinx, env):
+    """Generate all pending summaries in one batch once reading has finished."""
+    pending = getattr(env, "sphinx_llm_pending", [])
+    if not pending:
+        return
+    env.sphinx_llm_pending = []
+
+    # Summaries of documents which weren't read yet when they were referenced
+    # can be checked now that every doctree is up to date
+    pending = [resolve_pending(env, item) for item in pending]
+    pending = [item for item in pending if item is not None]
+
+    # Deduplicate so each referenced document is only summarised once
+    summarizer = _summarizers[env]
+    todo = {}
+    for item in pending:
+        if item.key not in summarizer.cache:
+            todo.setdefault(item.key, item)
+
+    if todo:
+        logger.info(f"Generating {len(todo)} LLM summaries")
+        # Start the longest documents first so the pool doesn't end up waiting
+        # on one long summary after all the short ones have finished
+        queue = sorted(todo.items(), key=lambda t: len(t[1].doc_contents), reverse=True)
+        futures = {
+            key: summarizer.submit(key, item.model, item.doc_contents)
+            for key, item in queue
+        }
+        try:
+            summaries = {key: future.result() for key, future in futures.items()}
+        finally:
+            # Forget failed requests too so a later build can retry them
+            with summarizer.in_flight_lock:
+                for key in futures:
+                    summarizer.in_flight.pop(key, None)
+        summarizer.cache.update(summaries)
+        save_cache(app)
+
+    # Persist the new summaries in the source files
+    by_source = {}
+    for item in pending:
+        by_source.setdefault(item.source, []).append(item)
+    for source, items in by_source.items():
+        update_source(Path(source), items, summarizer.cache)
+
+
+def resolve_summaries(app: Sphinx, doctree: document, docname: str):
+    """Replace title and summary placeholders with the referenced title and summary."""
+    for node in list(doctree.findall(docref_title)):
+        target_title = app.env.titles.get(node["target"])
+        text = target_title.astext() if target_title else node["target"]
+        title_node = node.parent
+        node.replace_self(Text(f" {text}"))
+        # Admonitions get a class from their title, so match the one it would
+        # have had if the title had been known when the docref was read
+        classes = title_node.parent["classes"]
+        classes.remove(f"admonition-{make_id(DEFERRED_TITLE)}")
+        classes.insert(0, f"admonition-{make_id(title_node.astext())}")
+
+    for node in list(doctree.findall(docref_summary)):
+        key = node["key"]
+        if key is None:
+            _, doc_contents = get_doctree(app.env, node["target"])
+            key = cache_key(node["model"], doc_contents)
+        if key == node.get("hash"):
+            summary = node["content"]
+        else:
+            summary = _summarizers[app.env].cache.get(key, "")
+        node.replace_self(parse_summary(doctree, summary))
+
 
-        # Only write if we are making changes
-        if source != original_source:
-            source_file.write_text("\n".join(source))
+def parse_summary(doctree: document, summary: str) -> list[Node]:
+    """Parse a summary as RST, the same way the docref content is on later builds."""
+    summary_doc = new_document(doctree["source"], doctree.settings)
+    RSTParser().parse(summary, summary_doc)
+    summary_doc.transformer.add_transform(SphinxSmartQuotes)
+    summary_doc.transformer.apply_transforms()
+    return summary_doc.children
 
 
 def setup(app: Sphinx) -> dict:
     app.add_directive("docref", Docref)
     app.add_config_value("sphinx_llm_options", {}, "env")
+    app.connect("builder-inited", init_summarizer)
+    app.connect("builder-inited", reset_doctree_cache)
+    app.connect("env-purge-doc", purge_pending)
+    app.connect("env-before-read-docs", note_unread_docs)
+    app.connect("doctree-read", purge_doctree)
+    app.connect("env-merge-info", merge_pending)
+    app.connect("env-updated", flush_summaries)
+    app.connect("env-updated", reset_doctree_cache)
+    app.connect("doctree-resolved", resolve_summaries)
+    app.connect("build-finished", shutdown_summarizer)
 
     return {
         "version": __version__,
@@ -0,0 +1,28 @@
+# SPDX-FileCopyrightText: Copyright (c) 2026, NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Shared pytest configuration for the sphinx_llm tests.
+"""
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep tests which share a Sphinx build on the same pytest-xdist worker.
+
+    Builds are cached per session, and each xdist worker has its own session,
+    so grouping by build parameters (with ``--dist loadgroup``) means each
+    unique build only runs on one worker.
+    """
+    if not config.pluginmanager.hasplugin("xdist"):
+        return
+
+    for item in items:
+        params = getattr(getattr(item, "callspec", None), "params", {})
+        build_params = sorted(
+            f"{name}={value}"
+            for name, value in params.items()
+            if name.startswith("sphinx_build")
+        )
+        if build_params:
+            item.add_marker(pytest.mark.xdist_group(",".join(build_params)))
@@ -0,0 +1,388 @@
+# SPDX-FileCopyrightText: Copyright (c) 2026, NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Tests for the sphinx_llm.docref module.
+"""
+
+from __future__ import annotations
+
+import itertools
+import pickle
+import random
+import re
+import string
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import ollama
+import pytest
+from docutils import nodes
+from docutils.core import publish_doctree
+from docutils.utils import new_document
+from sphinx.application import Sphinx
+
+from sphinx_llm import docref
+from sphinx_llm.docref import extract_summary_text
+
+_EXAMPLE_RST = """
+Feeding Pigs
+============
+
+Pigs enjoy *apples* and other fruit.
+
+.. This comment should not be summarised.
+
+- Wash the apples
+- Cut them into pieces
+"""
+
+_PIGS_RST = """
+Pigs
+====
+
+Pigs enjoy apples.
+"""
+
+
+@pytest.fixture
+def llm():
+    """Replace Ollama with a mock which numbers each summary it generates."""
+    summaries = (f'Pigs "love" *apples* -- summary {i}.' for i in itertools.count(1))
+
+    def chat(**kwargs):
+        message = ollama.Message(role="assistant", content=next(summaries))
+        return iter([ollama.ChatResponse(message=message)])
+
+    with patch.object(ollama, "Client") as client_class:
+        client = client_class.return_value
+        client.list.return_value.models = [SimpleNamespace(model=docref.DEFAULT_MODEL)]
+        client.chat.side_effect = chat
+        yield client
+
+
+@pytest.fixture
+def docref_project(tmp_path):
+    """A project where ``zoo`` has a docref to ``pigs`` without a summary yet."""
+    return make_docref_project(tmp_path)
+
+
+def make_docref_project(path, pigs_rst=_PIGS_RST):
+    """Create a project where ``zoo`` has a docref to ``pigs`` without a summary yet."""
+    srcdir = path / "source"
+    srcdir.mkdir(parents=True)
+    (srcdir / "conf.py").write_text('extensions = ["sphinx_llm.docref"]\n')
+    (srcdir / "index.rst").write_text(
+        "Index\n=====\n\n.. toctree::\n   :glob:\n\n   *\n"
+    )
+    (srcdir / "pigs.rst").write_text(pigs_rst)
+    (srcdir / "zoo.rst").write_text(
+        "Zoo\n===\n\n.. docref:: pigs\n\n   Summary goes here.\n"
+    )
+    return path
+
+
+def make_app(project, parallel=1):
+    """Create an app building the project as HTML, reusing previous builds' output."""
+    return Sphinx(
+        srcdir=str(project / "source"),
+        confdir=str(project / "source"),
+        outdir=str(project / "build"),
+        doctreedir=str(project / "doctrees"),
+        buildername="html",
+        status=None,
+        warning=None,
+        parallel=parallel,
+    )
+
+
+def build_docs(project, parallel=1):
+    """Build the project as HTML, reusing the output from previous builds."""
+    app = make_app(project, parallel)
+    app.build()
+    return app
+
+
+def get_docref_html(project, docname):
+    """Return the HTML of the first docref on a page."""
+    html = (project / "build" / f"{docname}.html").read_text()
+    return re.search(r'<div class="[^"]*docref.*?</div>', html, re.DOTALL).group(0)
+
+
+def test_extract_summary_text_matches_visible_text():
+    """Test that the extracted text contains the visible text of the document."""
+    doctree = publish_doctree(_EXAMPLE_RST)
+    text = extract_summary_text(doctree)
+
+    assert text == (
+        "Feeding Pigs\n\n"
+        "Pigs enjoy apples and other fruit.\n\n"
+        "Wash the apples\n\n"
+        "Cut them into pieces"
+    )
+
+
+def test_extract_summary_text_skips_docrefs():
+    """Test that docrefs, whose text depends on other documents, are left out."""
+    doctree = publish_doctree(
+        _EXAMPLE_RST + "\n.. admonition:: See also: Apples\n   :class: docref\n\n"
+        "   A summary of another page.\n"
+    )
+    text = extract_summary_text(doctree)
+
+    assert "Apples" not in text
+    assert "another page" not in text
+    assert text.endswith("Cut them into pieces")
+
+
+def test_extract_summary_text_is_bounded():
+    """Test that the extracted text never exceeds max_chars."""
+    doctree = publish_doctree("\n\n".join(["Lots of words here."] * 1000))
+    text = extract_summary_text(doctree, max_chars=100)
+
+    assert len(text) == 100
+    assert text.startswith("Lots of words here.")
+
+
+def test_extract_summary_text_keeps_text_at_the_limit():
+    """Test that text exactly max_chars long is returned untruncated."""
+    doctree = publish_doctree("\n\n".join(["x" * 47, "a", "b" * 48]))
+    text = extract_summary_text(doctree, max_chars=100)
+
+    assert len(text) == 100
+    assert text == extract_summary_text(doctree)
+
+
+def test_extract_summary_text_with_tiny_limits():
+    """Test that limits no longer than the truncation marker are still respected."""
+    doctree = publish_doctree("\n\n".join(["Lots of words here."] * 10))
+    for max_chars in range(7):
+        text = extract_summary_text(doctree, max_chars=max_chars)
+        assert len(text) <= max_chars
+        assert "words" not in text
+
+
+def test_extract_summary_text_keeps_head_and_tail():
+    """Test that long documents keep their beginning and end."""
+    paragraphs = [f"Paragraph {i}." for i in range(1000)]
+    doctree = publish_doctree("\n\n".join(paragraphs))
+    text = extract_summary_text(doctree, max_chars=200)
+
+    assert len(text) == 200
+    assert text.startswith("Paragraph 0.")
+    assert text.endswith("Paragraph 999.")
+    assert "Paragraph 500." not in text
+
+
+def truncate_reference(text, max_chars):
+    """Truncate already joined text the simple way, to check the streaming version."""
+    if len(text) <= max_chars:
+        return text
+    budget = max(0, max_chars - len(docref.TRUNCATION_MARKER))
+    head_chars = budget // 2
+    tail_chars = budget - head_chars
+    tail = text[-tail_chars:] if tail_chars else ""
+    return (text[:head_chars] + docref.TRUNCATION_MARKER + tail)[:max_chars]
+
+
+def make_doctree(paragraphs):
+    """Build a doctree of plain paragraphs without going through the RST parser."""
+    doctree = new_document("<test>")
+    for text in paragraphs:
+        doctree += nodes.paragraph(text=text)
+    return doctree
+
+
+def test_extract_summary_text_fills_the_tail_from_a_straddling_block():
+    """Test that a block across the head and tail boundary is shared by both."""
+    paragraphs = ["a" * 34 + "ae", "b" * 30, "daee" + "c" * 36]
+    text = extract_summary_text(make_doctree(paragraphs), max_chars=97)
+
+    assert len(text) == 97
+    assert text == truncate_reference("\n\n".join(paragraphs), 97)
+
+
+def test_extract_summary_text_matches_truncating_the_joined_text():
+    """Test random documents and limits against truncating the joined text."""
+    rng = random.Random(0)
+    for _ in range(500):
+        paragraphs = [
+            rng.choice(string.ascii_lowercase) * rng.randint(1, 60) + str(i)
+            for i in range(rng.randint(1, 12))
+        ]
+        max_chars = rng.randint(0, 300)
+        text = extract_summary_text(make_doctree(paragraphs), max_chars=max_chars)
+
+        assert text == truncate_reference("\n\n".join(paragraphs), max_chars)
+
+
+def test_ensure_model_contacts_ollama_once_per_model(llm):
+    """Test that models are listed once and each is only pulled and warmed up once."""
+    summarizer = docref.Summarizer(max_workers=1, cache={})
+    llm.list.return_value.models = [SimpleNamespace(model="llama3.2:3b")]
+    summarizer.ensure_model("llama3.2:3b")
+    summarizer.ensure_model("llama3.2:3b")
+    summarizer.ensure_model("gemma3")
+
+    llm.list.assert_called_once()
+    llm.pull.assert_called_once_with("gemma3")
+    assert llm.generate.call_count == 2
+
+
+def test_submit_summary_coalesces_identical_requests():
+    """Test that identical summary requests share a single LLM call."""
+    release = threading.Event()
+
+    def slow_summarize(model, contents):
+        release.wait()
+        return "A summary."
+
+    summarizer = docref.Summarizer(max_workers=2, cache={})
+    with patch.object(summarizer, "summarize", side_effect=slow_summarize) as mock:
+        first = summarizer.submit("key", "llama3.2:3b", "Pigs like apples.")
+        second = summarizer.submit("key", "llama3.2:3b", "Pigs like apples.")
+        release.set()
+
+        assert first is second
+        assert second.result() == "A summary."
+    mock.assert_called_once()
+
+
+def test_invoke_llm_joins_streamed_chunks(llm):
+    """Test that the streamed response is joined into a single summary."""
+    chunks = [
+        ollama.ChatResponse(message=ollama.Message(role="assistant", content=text))
+        for text in ["Pigs ", "like ", "apples.", ""]
+    ]
+    llm.chat.side_effect = None
+    llm.chat.return_value = iter(chunks)
+    summarizer = docref.Summarizer(max_workers=1, cache={})
+    summary = summarizer.invoke_llm("llama3.2:3b", "Pigs like apples.")
+
+    assert summary == "Pigs like apples."
+    assert llm.chat.call_args.kwargs["stream"] is True
+
+
+@pytest.mark.parametrize(
+    "options, env, expected",
+    [
+        ({"parallel": 8}, "3", 8),
+        ({}, "3", 3),
+        ({}, None, docref.DEFAULT_PARALLEL),
+    ],
+)
+def test_parallel_requests(monkeypatch, options, env, expected):
+    """Test the number of parallel requests comes from the config, then the environment."""
+    if env is None:
+        monkeypatch.delenv("SPHINX_LLM_PARALLEL", raising=False)
+    else:
+        monkeypatch.setenv("SPHINX_LLM_PARALLEL", env)
+    config = SimpleNamespace(sphinx_llm_options=options)
+
+    assert docref.parallel_requests(config) == expected
+
+
+@pytest.mark.parametrize(
+    "options, env",
+    [({"parallel": 0}, "3"), ({"parallel": None}, "3"), ({}, "lots"), ({}, "-1")],
+)
+def test_invalid_parallel_requests_fall_back_to_the_default(monkeypatch, options, env):
+    """Test that invalid numbers of parallel requests are warned about, not raised."""
+    monkeypatch.setenv("SPHINX_LLM_PARALLEL", env)
+    config = SimpleNamespace(sphinx_llm_options=options)
+
+    with patch.object(docref.logger, "warning") as warning:
+        assert docref.parallel_requests(config) == docref.DEFAULT_PARALLEL
+    warning.assert_called_once()
+
+
+def test_summaries_are_generated_and_written_back(llm, docref_project):
+    """Test that a missing summary is generated once and stored in the source."""
+    build_docs(docref_project)
+
+    source = (docref_project / "source" / "zoo.rst").read_text()
+    assert llm.chat.call_count == 1
+    assert 'Pigs "love" *apples* -- summary 1.' in source
+    assert "Summary goes here." not in source
+    assert re.search(r"^   :hash: [0-9a-f]{32}$", source, re.MULTILINE)
+
+    # The summary is rendered the same as when it's read back from the source
+    first_html = get_docref_html(docref_project, "zoo")
+    assert "<em>apples</em>" in first_html
+
+    build_docs(docref_project)
+
+    assert llm.chat.call_count == 1
+    assert (docref_project / "source" / "zoo.rst").read_text() == source
+    assert get_docref_html(docref_project, "zoo") == first_html
+
+
+def test_summaries_are_regenerated_when_the_target_changes(llm, docref_project):
+    """Test that editing the referenced document regenerates its summary."""
+    build_docs(docref_project)
+    first_source = (docref_project / "source" / "zoo.rst").read_text()
+
+    (docref_project / "source" / "pigs.rst").write_text(
+        _PIGS_RST + "\nThey also enjoy pears.\n"
+    )
+    build_docs(docref_project)
+
+    source = (docref_project / "source" / "zoo.rst").read_text()
+    assert llm.chat.call_count == 2
+    assert "summary 2." in source
+    assert "summary 1." not in source
+    assert source.count(":hash:") == 1
+    assert source != first_source
+    assert "summary 2." in get_docref_html(docref_project, "zoo")
+
+
+def test_failed_summaries_are_not_left_in_flight(llm, docref_project):
+    """Test that a failed request is forgotten so the next build can retry it."""
+    llm.chat.side_effect = RuntimeError("Ollama went away")
+
+    app = make_app(docref_project)
+    with pytest.raises(Exception, match="Ollama went away"):
+        app.build()
+
+    assert docref._summarizers[app.env].in_flight == {}
+
+
+@pytest.mark.parametrize("parallel", [1, 2])
+def test_summaries_of_documents_read_later(llm, docref_project, parallel):
+    """Test docrefs to documents which are read later or by another reader."""
+    srcdir = docref_project / "source"
+    # Documents are read in order, so this is read before the page it references
+    (srcdir / "zoo.rst").rename(srcdir / "aardvark.rst")
+    build_docs(docref_project, parallel=parallel)
+
+    source = (srcdir / "aardvark.rst").read_text()
+    assert llm.chat.call_count == 1
+    assert "summary 1." in source
+    first_html = get_docref_html(docref_project, "aardvark")
+    assert "See also: Pigs" in first_html
+    assert "<em>apples</em>" in first_html
+
+    # The target has been read by now so the docref isn't deferred
+    build_docs(docref_project, parallel=parallel)
+
+    assert llm.chat.call_count == 1
+    assert (srcdir / "aardvark.rst").read_text() == source
+    assert get_docref_html(docref_project, "aardvark") == first_html
+
+
+def test_summary_caches_are_kept_per_app(llm, tmp_path):
+    """Test that each app only saves the summaries generated by its own builds."""
+    first = make_docref_project(tmp_path / "first")
+    second = make_docref_project(
+        tmp_path / "second", _PIGS_RST + "\nThey also enjoy pears.\n"
+    )
+    build_docs(first)
+    build_docs(second)
+
+    assert llm.chat.call_count == 2
+    caches = []
+    for project in [first, second]:
+        with open(project / "doctrees" / docref.CACHE_FILENAME, "rb") as f:
+            caches.append(pickle.load(f))
+    assert len(caches[0]) == len(caches[1]) == 1
+    assert caches[0].keys() != caches[1].keys()
@@ -6,9 +6,15 @@ Tests for the sphinx_llm.txt module.
 
 from __future__ import annotations
 
+import filecmp
+import functools
+import hashlib
+import importlib.metadata
+import os
 import re
-import tempfile
-from collections.abc import Generator
+import shutil
+import subprocess
+from collections.abc import Iterator
 from pathlib import Path
 from unittest.mock import patch
 
@@ -19,128 +25,344 @@ from sphinx.errors import ExtensionError
 
 from sphinx_llm.txt import MarkdownGenerator
 
+_URL_RE = re.compile(rb"\[([^\]]+)\]\(([^)]+)\)")
+
+DOCS_SOURCE_DIR = Path(__file__).parent.parent.parent.parent / "docs" / "source"
+EXTENSION_DIR = Path(__file__).parent.parent
+BUILD_CACHE_ENV = "SPHINX_LLM_TEST_BUILD_CACHE"
 
-def _build_sphinx(
-    builder: str, confoverrides: dict | None = None
-) -> Generator[tuple[Sphinx, Path, Path], None, None]:
-    """Build Sphinx documentation into a temporary directory.
 
-    Yields:
-        Tuple of (Sphinx app, temporary build directory path, source directory path)
+def _build_sphinx(
+    builder: str,
+    temp_path: Path,
+    confoverrides: dict | None = None,
+    doctree_dir: Path | None = None,
+    srcdir: Path = DOCS_SOURCE_DIR,
+    freshenv: bool = False,
+) -> tuple[Sphinx, Path, Path]:
+    """Build Sphinx documentation into ``temp_path``.
+
+    If ``doctree_dir`` is given any environment already pickled there is reused,
+    so only documents which are out of date for this configuration are re-read.
+    ``srcdir`` defaults to the example docs, pass a copy to build edited sources.
+
+    Returns:
+        Tuple of (Sphinx app, build directory path, source directory path)
     """
-    docs_source_dir = Path(__file__).parent.parent.parent.parent / "docs" / "source"
     overrides = {"llms_txt_build_parallel": True}
     if confoverrides:
         overrides.update(confoverrides)
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        build_dir = temp_path / "build"
+    build_dir = temp_path / "build"
+    if doctree_dir is None:
         doctree_dir = temp_path / "doctrees"
 
-        app = Sphinx(
-            srcdir=str(docs_source_dir),
-            confdir=str(docs_source_dir),
-            outdir=str(build_dir),
-            doctreedir=str(doctree_dir),
-            buildername=builder,
-            warningiserror=False,
-            freshenv=True,
-            confoverrides=overrides,
-        )
-        app.build()
-        yield app, build_dir, docs_source_dir
+    app = Sphinx(
+        srcdir=str(srcdir),
+        confdir=str(srcdir),
+        outdir=str(build_dir),
+        doctreedir=str(doctree_dir),
+        buildername=builder,
+        status=None,
+        warning=None,
+        freshenv=freshenv,
+        confoverrides=overrides,
+        parallel=os.cpu_count() or 1,
+    )
+    app.build()
+    return app, build_dir, srcdir
+
+
+def _sources_key() -> str:
+    """Hash the mtimes of the docs and extension sources, and dependency versions.
+
+    Any edit to the sources, or upgrading Sphinx, the markdown builder or
+    docutils, gives a new key, so cached builds never outlive the code or
+    content which produced them.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for package in ["sphinx", "sphinx-markdown-builder", "docutils"]:
+        digest.update(f"{package}=={importlib.metadata.version(package)}\n".encode())
+    paths = [p for p in DOCS_SOURCE_DIR.rglob("*") if p.is_file()]
+    paths += EXTENSION_DIR.glob("*.py")
+    for path in sorted(paths):
+        digest.update(f"{path}:{path.stat().st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _build_cache_dir(config: pytest.Config) -> Path | None:
+    """Return a build directory which persists between test sessions.
+
+    This is opt-in by setting ``SPHINX_LLM_TEST_BUILD_CACHE=1``, so CI always
+    builds from scratch. Returns ``None`` when it isn't set or the cache provider
+    plugin is disabled. Builds from older source keys are removed, and each
+    xdist worker gets its own directory so concurrent builds never share an
+    output tree.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None or os.environ.get(BUILD_CACHE_ENV) != "1":
+        return None
+
+    root = cache.mkdir("sphinx_llm_builds")
+    key = _sources_key()
+    for entry in root.iterdir():
+        if entry.name != key:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    return root / key / worker
+
+
+@pytest.fixture(scope="session")
+def build_sphinx(request, tmp_path_factory):
+    """Return a function that builds each unique configuration only once per session.
+
+    Builds share a doctree directory per ``llms_txt_build_parallel`` value, so
+    both the parallel and the sequential markdown builds get run. None of the
+    other overrides used here affect the environment, so the sources are only
+    read once per directory.
+    With ``SPHINX_LLM_TEST_BUILD_CACHE=1`` outputs are kept in the pytest cache
+    between sessions, so unless the docs or extension have changed Sphinx only
+    has to do a no-op incremental build.
+    """
+    cache_dir = _build_cache_dir(request.config)
+    builds = {}
+    doctree_dirs = {}
+
+    def mkdir(name: str) -> Path:
+        if cache_dir is None:
+            return tmp_path_factory.mktemp(name)
+        path = cache_dir / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def build(builder: str, confoverrides: dict | None = None):
+        overrides_key = frozenset((confoverrides or {}).items())
+        key = (builder, overrides_key)
+        if key not in builds:
+            parallel = (confoverrides or {}).get("llms_txt_build_parallel", True)
+            if parallel not in doctree_dirs:
+                doctree_dirs[parallel] = mkdir(
+                    "doctrees-parallel" if parallel else "doctrees-sequential"
+                )
+            doctree_dir = doctree_dirs[parallel]
+            name = hashlib.blake2b(
+                repr(sorted(overrides_key)).encode(), digest_size=4
+            ).hexdigest()
+            builds[key] = _build_sphinx(
+                builder, mkdir(f"{builder}-{name}"), confoverrides, doctree_dir
+            )
+        return builds[key]
+
+    return build
+
+
+def assert_file_exists_with_content(path: Path, message: str = "") -> None:
+    """Assert a file exists and is non-empty, with a single stat call."""
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        pytest.fail(message or f"File not found: {path}")
+    assert size > 0, f"File is empty: {path}"
 
 
-def assert_file_exists_with_content(path: Path) -> None:
-    """Assert a file exists and is non-empty."""
-    assert path.exists(), f"File not found: {path}"
-    assert path.stat().st_size > 0, f"File is empty: {path}"
+def get_output_files(build_dir: Path) -> dict[Path, int]:
+    """Scan the build directory once, returning file sizes keyed by relative path.
 
+    ``os.scandir`` entries carry their file type, so only the files themselves
+    need a ``stat`` call.
+    """
+    outputs = {}
+    stack = [(build_dir, Path())]
+    while stack:
+        directory, rel_dir = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append((entry.path, rel_dir / entry.name))
+                else:
+                    outputs[rel_dir / entry.name] = entry.stat().st_size
+    return outputs
+
+
+def assert_output_exists_with_content(outputs: dict[Path, int], path: Path) -> None:
+    """Assert a relative path is in the build outputs and is non-empty."""
+    assert path in outputs, f"File not found: {path}"
+    assert outputs[path] > 0, f"File is empty: {path}"
+
+
+@functools.cache
+def expected_md_paths(
+    builder_name: str, rel_path: Path, suffix_mode: str
+) -> tuple[Path, ...]:
+    """Return the markdown files expected for an RST source, relative to the build dir.
+
+    The primary (spec-compliant) file always comes first.
+    """
+    if suffix_mode == "both":
+        suffix_mode = "auto"
+
+    if builder_name == "html":
+        if suffix_mode == "replace":
+            return (rel_path.with_suffix(".md"),)
+        return (rel_path.with_suffix(".html.md"),)
+
+    page_dir = rel_path.parent if rel_path.stem == "index" else rel_path.with_suffix("")
+    if suffix_mode == "replace":
+        return (page_dir / "index.md",)
 
-def get_non_index_rst_files(source_dir: Path) -> list[Path]:
-    """Get all non-index RST files from source directory."""
-    rst_files = [f for f in source_dir.rglob("*.rst") if f.stem != "index"]
-    assert len(rst_files) > 0, "No non-index RST files found in source directory"
+    file_suffix_md = page_dir / "index.html.md"
+    url_suffix_md = (
+        Path("index.md") if page_dir == Path(".") else page_dir.with_suffix(".md")
+    )
+    if suffix_mode == "file-suffix":
+        return (file_suffix_md,)
+    if suffix_mode == "url-suffix":
+        return (url_suffix_md,)
+    return (file_suffix_md, url_suffix_md)
+
+
+def iter_rst_files(source_dir: Path) -> Iterator[Path]:
+    """Yield RST files relative to ``source_dir``, using the file types from os.scandir."""
+    stack = [(source_dir, Path())]
+    while stack:
+        directory, rel_dir = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_dir / entry.name))
+                elif entry.name.endswith(".rst"):
+                    yield rel_dir / entry.name
+
+
+@pytest.fixture(scope="session")
+def rst_files() -> tuple[Path, ...]:
+    """Collect all RST files, relative to the docs source directory, once per session."""
+    rst_files = tuple(iter_rst_files(DOCS_SOURCE_DIR))
+    assert len(rst_files) > 0, "No RST files found in source directory"
     return rst_files
 
 
+@pytest.fixture(scope="session")
+def expected_outputs(rst_files) -> dict[str, tuple[tuple[Path, Path], ...]]:
+    """Map each HTML builder to the (html, markdown) outputs expected for every RST file."""
+    outputs = {}
+    for builder_name in ("html", "dirhtml"):
+        pairs = []
+        for rel_path in rst_files:
+            if rel_path.stem == "index" or builder_name == "html":
+                html_name = rel_path.with_suffix(".html")
+            else:
+                html_name = rel_path.with_suffix("") / "index.html"
+            [md_name, *_] = expected_md_paths(builder_name, rel_path, "auto")
+            pairs.append((html_name, md_name))
+        outputs[builder_name] = tuple(pairs)
+    return outputs
+
+
+@pytest.fixture(scope="session")
+def sphinx_app(tmp_path_factory) -> Sphinx:
+    """Create a Sphinx app without building, for tests which only need the app.
+
+    Building sequentially means the extension doesn't start a markdown
+    subprocess when the builder is initialised.
+    """
+    temp_path = tmp_path_factory.mktemp("app")
+    return Sphinx(
+        srcdir=str(DOCS_SOURCE_DIR),
+        confdir=str(DOCS_SOURCE_DIR),
+        outdir=str(temp_path / "build"),
+        doctreedir=str(temp_path / "doctrees"),
+        buildername="html",
+        status=None,
+        warning=None,
+        confoverrides={"llms_txt_build_parallel": False},
+    )
+
+
 @pytest.fixture(
+    scope="session",
     params=[
         ("html", True),
         ("dirhtml", True),
         ("html", False),
         ("dirhtml", False),
-    ]
+    ],
 )
-def sphinx_build(request) -> Generator[tuple[Sphinx, Path, Path], None, None]:
+def sphinx_build(request, build_sphinx) -> tuple[Sphinx, Path, Path]:
     """Build Sphinx docs with different builder and parallel combinations."""
     builder, parallel = request.param
-    yield from _build_sphinx(builder, {"llms_txt_build_parallel": parallel})
+    return build_sphinx(builder, {"llms_txt_build_parallel": parallel})
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sphinx_build_with_suffix_mode_config(
-    request,
-) -> Generator[tuple[Sphinx, Path, Path], None, None]:
+    request, build_sphinx
+) -> tuple[Sphinx, Path, Path]:
     """Build Sphinx docs with specific llms_txt_suffix_mode configuration."""
     builder, suffix_mode = request.param
-    yield from _build_sphinx(builder, {"llms_txt_suffix_mode": suffix_mode})
+    return build_sphinx(builder, {"llms_txt_suffix_mode": suffix_mode})
 
 
-def test_markdown_generator_init(sphinx_build):
+def test_markdown_generator_init(sphinx_app):
     """Test MarkdownGenerator initialization."""
-    app, _, _ = sphinx_build
+    app = sphinx_app
     generator = MarkdownGenerator(app)
     assert generator.app == app
 
 
-def test_markdown_generator_setup(sphinx_build):
+def test_markdown_generator_setup(sphinx_app):
     """Test that setup connects to the correct events."""
-    app, _, _ = sphinx_build
+    app = sphinx_app
     generator = MarkdownGenerator(app)
 
-    connect_calls = []
-    original_connect = app.connect
-
-    def record_connect(event, callback):
-        connect_calls.append((event, callback))
-        return original_connect(event, callback)
-
-    app.connect = record_connect
-    generator.setup()
+    with patch.object(app, "connect", wraps=app.connect) as spy:
+        generator.setup()
 
-    events = [call[0] for call in connect_calls]
+    events = [call.args[0] for call in spy.call_args_list]
     assert "builder-inited" in events
 
 
-def test_combine_builds_with_exception(sphinx_build):
+def test_combine_builds_with_exception(sphinx_app):
     """Test that combine_builds returns early on exception."""
-    app, _, _ = sphinx_build
+    app = sphinx_app
     generator = MarkdownGenerator(app)
     generator.combine_builds(app, Exception("fail"))
 
 
-def test_rst_files_have_corresponding_output_files(sphinx_build):
+def test_rst_files_have_corresponding_output_files(sphinx_build, expected_outputs):
     """Test that all RST files have corresponding HTML and HTML.MD files in output."""
-    app, build_dir, source_dir = sphinx_build
+    app, build_dir, _ = sphinx_build
 
-    rst_files = list(source_dir.rglob("*.rst"))
-    assert len(rst_files) > 0, "No RST files found in source directory"
+    outputs = get_output_files(build_dir)
 
-    for rst_file in rst_files:
-        rel_path = rst_file.relative_to(source_dir)
+    for html_name, html_md_name in expected_outputs[app.builder.name]:
+        assert_output_exists_with_content(outputs, html_name)
+        assert_output_exists_with_content(outputs, html_md_name)
 
-        html_or_index = rel_path.stem == "index" or app.builder.name == "html"
-        html_name = (
-            rel_path.with_suffix(".html")
-            if html_or_index
-            else rel_path.with_suffix("") / "index.html"
-        )
-        html_md_name = html_name.with_suffix(".html.md")
 
-        assert_file_exists_with_content(build_dir / html_name)
-        assert_file_exists_with_content(build_dir / html_md_name)
+@pytest.mark.parametrize(
+    "builder_name, rel_path, suffix_mode, expected",
+    [
+        ("html", "apples.rst", "auto", ["apples.html.md"]),
+        ("html", "nested/example.rst", "replace", ["nested/example.md"]),
+        ("dirhtml", "index.rst", "auto", ["index.html.md", "index.md"]),
+        ("dirhtml", "apples.rst", "both", ["apples/index.html.md", "apples.md"]),
+        ("dirhtml", "nested/index.rst", "url-suffix", ["nested.md"]),
+        (
+            "dirhtml",
+            "nested/example.rst",
+            "file-suffix",
+            ["nested/example/index.html.md"],
+        ),
+        ("dirhtml", "apples.rst", "replace", ["apples/index.md"]),
+    ],
+)
+def test_expected_md_paths(builder_name, rel_path, suffix_mode, expected):
+    """Test the expected markdown paths used to check the build outputs."""
+    assert expected_md_paths(builder_name, Path(rel_path), suffix_mode) == tuple(
+        Path(path) for path in expected
+    )
 
 
 def test_llms_txt_sitemap_links_exist(sphinx_build):
@@ -150,13 +372,14 @@ def test_llms_txt_sitemap_links_exist(sphinx_build):
     llms_txt_path = build_dir / "llms.txt"
     assert llms_txt_path.exists(), f"llms.txt not found: {llms_txt_path}"
 
-    content = llms_txt_path.read_text(encoding="utf-8")
+    # Links are matched on the raw bytes, only the URLs need decoding
+    content = llms_txt_path.read_bytes()
 
-    url_pattern = r"\[([^\]]+)\]\(([^)]+)\)"
-    matches = re.findall(url_pattern, content)
+    matches = _URL_RE.findall(content)
     assert len(matches) > 0, "No URLs found in llms.txt sitemap"
 
     for _, url in matches:
+        url = url.decode()
         # Limit the check to relative paths
         if not url.startswith(("http://", "https://")):
             assert_file_exists_with_content(build_dir / url)
@@ -180,18 +403,17 @@ def test_llms_txt_does_not_use_anchor_tag_as_description(sphinx_build):
 
 
 @pytest.fixture(
+    scope="session",
     params=[
         ("html", "https://example.com/docs/"),
         ("dirhtml", "https://example.com/docs/"),
         ("dirhtml", "https://example.com/docs"),  # trailing slash is optional
-    ]
+    ],
 )
-def sphinx_build_with_http_base(
-    request,
-) -> Generator[tuple[Sphinx, Path, Path], None, None]:
+def sphinx_build_with_http_base(request, build_sphinx) -> tuple[Sphinx, Path, Path]:
     """Build Sphinx docs with markdown_http_base set."""
     builder, http_base = request.param
-    yield from _build_sphinx(builder, {"markdown_http_base": http_base})
+    return build_sphinx(builder, {"markdown_http_base": http_base})
 
 
 def test_llms_txt_sitemap_uses_markdown_http_base(sphinx_build_with_http_base):
@@ -203,12 +425,12 @@ def test_llms_txt_sitemap_uses_markdown_http_base(sphinx_build_with_http_base):
     llms_txt_path = build_dir / "llms.txt"
     assert llms_txt_path.exists(), f"llms.txt not found: {llms_txt_path}"
 
-    content = llms_txt_path.read_text(encoding="utf-8")
-    url_pattern = r"\[([^\]]+)\]\(([^)]+)\)"
-    matches = re.findall(url_pattern, content)
+    content = llms_txt_path.read_bytes()
+    matches = _URL_RE.findall(content)
     assert len(matches) > 0, "No URLs found in llms.txt sitemap"
 
     for _, url in matches:
+        url = url.decode()
         assert url.startswith(http_base), (
             f"Expected URL to start with {http_base!r}, got {url!r}"
         )
@@ -227,62 +449,37 @@ def test_llms_txt_sitemap_uses_markdown_http_base(sphinx_build_with_http_base):
     ],
     indirect=True,
 )
-def test_dirhtml_suffix_mode_configuration(sphinx_build_with_suffix_mode_config):
+def test_dirhtml_suffix_mode_configuration(
+    sphinx_build_with_suffix_mode_config, rst_files
+):
     """Test that llms_txt_suffix_mode configuration controls which markdown files are generated.
 
     Also tests that 'both' mode works as a backward-compatible alias for 'auto'.
     """
-    app, build_dir, source_dir = sphinx_build_with_suffix_mode_config
+    app, build_dir, _ = sphinx_build_with_suffix_mode_config
     suffix_mode = app.config.llms_txt_suffix_mode
 
-    # "both" is treated as "auto" internally
-    effective_mode = "auto" if suffix_mode == "both" else suffix_mode
-
-    rst_files = get_non_index_rst_files(source_dir)
-
-    for rst_file in rst_files:
-        rel_path = rst_file.relative_to(source_dir)
-
-        file_suffix_md = build_dir / rel_path.with_suffix("") / "index.html.md"
-        url_suffix_md = build_dir / rel_path.with_suffix(".md")
+    outputs = get_output_files(build_dir)
 
-        if effective_mode == "file-suffix":
-            assert_file_exists_with_content(file_suffix_md)
-            assert not url_suffix_md.exists(), (
-                f"URL-suffix file should not exist with suffix_mode='file-suffix': {url_suffix_md}"
-            )
-        elif effective_mode == "url-suffix":
-            assert_file_exists_with_content(url_suffix_md)
-            assert not file_suffix_md.exists(), (
-                f"File-suffix file should not exist with suffix_mode='url-suffix': {file_suffix_md}"
-            )
-        elif effective_mode == "auto":
-            assert_file_exists_with_content(file_suffix_md)
-            assert_file_exists_with_content(url_suffix_md)
-            # Verify content is the same (they should be copies)
-            assert file_suffix_md.read_text(
-                encoding="utf-8"
-            ) == url_suffix_md.read_text(encoding="utf-8"), (
-                f"Content mismatch between {file_suffix_md} and {url_suffix_md}"
-            )
+    for rel_path in rst_files:
+        expected = expected_md_paths("dirhtml", rel_path, suffix_mode)
+        for md_path in expected:
+            assert_output_exists_with_content(outputs, md_path)
 
-    # Root index should always be generated regardless of suffix mode
-    index_file_suffix_md = build_dir / "index.html.md"
-    index_url_suffix_md = build_dir / "index.md"
+        # Only the formats for this suffix mode should be generated
+        for md_path in expected_md_paths("dirhtml", rel_path, "auto"):
+            if md_path not in expected:
+                assert md_path not in outputs, (
+                    f"File should not exist with suffix_mode={suffix_mode!r}: {md_path}"
+                )
 
-    if effective_mode == "file-suffix":
-        assert_file_exists_with_content(index_file_suffix_md)
-        assert not index_url_suffix_md.exists(), (
-            "Root index url-suffix file should not exist with suffix_mode='file-suffix'"
-        )
-    elif effective_mode == "url-suffix":
-        assert_file_exists_with_content(index_url_suffix_md)
-        assert not index_file_suffix_md.exists(), (
-            "Root index file-suffix file should not exist with suffix_mode='url-suffix'"
-        )
-    elif effective_mode == "auto":
-        assert_file_exists_with_content(index_file_suffix_md)
-        assert_file_exists_with_content(index_url_suffix_md)
+        # Verify content is the same (they should be copies), filecmp
+        # rejects files of different sizes before reading either of them
+        if len(expected) == 2:
+            file_suffix_md, url_suffix_md = expected
+            assert filecmp.cmp(
+                build_dir / file_suffix_md, build_dir / url_suffix_md, shallow=False
+            ), f"Content mismatch between {file_suffix_md} and {url_suffix_md}"
 
 
 @pytest.mark.parametrize(
@@ -290,84 +487,59 @@ def test_dirhtml_suffix_mode_configuration(sphinx_build_with_suffix_mode_config)
     [("html", "replace"), ("dirhtml", "replace")],
     indirect=True,
 )
-def test_replace_suffix_mode(sphinx_build_with_suffix_mode_config):
+def test_replace_suffix_mode(sphinx_build_with_suffix_mode_config, rst_files):
     """Test that replace mode replaces .html with .md for both html and dirhtml builders."""
-    app, build_dir, source_dir = sphinx_build_with_suffix_mode_config
+    app, build_dir, _ = sphinx_build_with_suffix_mode_config
 
-    rst_files = list(source_dir.rglob("*.rst"))
-    assert len(rst_files) > 0, "No RST files found in source directory"
-
-    for rst_file in rst_files:
-        rel_path = rst_file.relative_to(source_dir)
+    outputs = get_output_files(build_dir)
 
-        if app.builder.name == "dirhtml":
-            if rel_path.stem == "index":
-                if rel_path.parent == Path("."):
-                    replace_md = build_dir / "index.md"
-                else:
-                    replace_md = build_dir / rel_path.parent / "index.md"
-            else:
-                replace_md = build_dir / rel_path.with_suffix("") / "index.md"
-        else:
-            replace_md = build_dir / rel_path.with_suffix(".md")
-
-        assert_file_exists_with_content(replace_md)
+    for rel_path in rst_files:
+        [replace_md] = expected_md_paths(app.builder.name, rel_path, "replace")
+        assert_output_exists_with_content(outputs, replace_md)
 
         # Ensure .html.md files do NOT exist with replace mode
-        if app.builder.name == "html":
-            html_md = build_dir / rel_path.with_suffix(".html.md")
-        elif rel_path.stem == "index":
-            if rel_path.parent == Path("."):
-                html_md = build_dir / "index.html.md"
-            else:
-                html_md = build_dir / rel_path.parent / "index.html.md"
-        else:
-            html_md = build_dir / rel_path.with_suffix("") / "index.html.md"
-
-        assert not html_md.exists(), (
+        [html_md] = expected_md_paths(app.builder.name, rel_path, "file-suffix")
+        assert html_md not in outputs, (
             f"File with .html.md extension should not exist in replace mode: {html_md}"
         )
 
 
-def test_invalid_suffix_mode_raises_error():
+def test_invalid_suffix_mode_raises_error(tmp_path):
     """Test that invalid llms_txt_suffix_mode values raise an error."""
     with pytest.raises(ExtensionError, match="Invalid llms_txt_suffix_mode"):
-        list(_build_sphinx("dirhtml", {"llms_txt_suffix_mode": "invalid-mode"}))
+        _build_sphinx("dirhtml", tmp_path, {"llms_txt_suffix_mode": "invalid-mode"})
 
 
 @pytest.mark.parametrize("builder", ["html", "dirhtml"])
-def test_llms_txt_disabled(builder):
+def test_llms_txt_disabled(builder, tmp_path):
     """Test that setting llms_txt_enabled=False prevents the extension from running.
 
     Spies on MarkdownGenerator.combine_builds. If the early return
     in build_llms_txt happens, combine_builds is never connected
     to build-finished, and its call count stays at zero.
     """
-    docs_source_dir = Path(__file__).parent.parent.parent.parent / "docs" / "source"
-
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-
-        with patch.object(MarkdownGenerator, "combine_builds") as mock_combine:
-            app = Sphinx(
-                srcdir=str(docs_source_dir),
-                confdir=str(docs_source_dir),
-                outdir=str(tmp_path / "build"),
-                doctreedir=str(tmp_path / "doctrees"),
-                buildername=builder,
-                warningiserror=False,
-                freshenv=True,
-                confoverrides={
-                    "llms_txt_build_parallel": False,
-                    "llms_txt_enabled": False,
-                },
-            )
-            app.build()
 
-        assert mock_combine.call_count == 0, (
-            f"combine_builds was called {mock_combine.call_count} time(s) "
-            "despite llms_txt_enabled=False — extension ran when it should not have"
+    with patch.object(MarkdownGenerator, "combine_builds") as mock_combine:
+        app = Sphinx(
+            srcdir=str(DOCS_SOURCE_DIR),
+            confdir=str(DOCS_SOURCE_DIR),
+            outdir=str(tmp_path / "build"),
+            doctreedir=str(tmp_path / "doctrees"),
+            buildername=builder,
+            status=None,
+            warning=None,
+            freshenv=True,
+            confoverrides={
+                "llms_txt_build_parallel": False,
+                "llms_txt_enabled": False,
+            },
         )
+        app.build()
+
+    assert mock_combine.call_count == 0, (
+        f"combine_builds was called {mock_combine.call_count} time(s) "
+        "despite llms_txt_enabled=False — extension ran when it should not have"
+    )
 
 
 def test_llms_full_txt_created_by_default(sphinx_build):
@@ -375,17 +547,16 @@ def test_llms_full_txt_created_by_default(sphinx_build):
     _, build_dir, _ = sphinx_build
 
     llms_full_txt_path = build_dir / "llms-full.txt"
-    assert llms_full_txt_path.exists(), "llms-full.txt should be created by default"
-    assert llms_full_txt_path.stat().st_size > 0, "llms-full.txt should not be empty"
+    assert_file_exists_with_content(
+        llms_full_txt_path, "llms-full.txt should be created by default"
+    )
 
 
-@pytest.fixture
-def sphinx_build_no_llms_full(
-    request,
-) -> Generator[tuple[Sphinx, Path, Path], None, None]:
+@pytest.fixture(scope="session")
+def sphinx_build_no_llms_full(request, build_sphinx) -> tuple[Sphinx, Path, Path]:
     """Build Sphinx docs with llms_txt_full_build set to False."""
     builder = request.param
-    yield from _build_sphinx(builder, {"llms_txt_full_build": False})
+    return build_sphinx(builder, {"llms_txt_full_build": False})
 
 
 @pytest.mark.parametrize(
@@ -413,10 +584,10 @@ def test_llms_txt_sitemap_still_created_when_full_disabled(sphinx_build_no_llms_
     _, build_dir, _ = sphinx_build_no_llms_full
 
     llms_txt_path = build_dir / "llms.txt"
-    assert llms_txt_path.exists(), (
-        "llms.txt should still be created when llms_txt_full_build is False"
+    assert_file_exists_with_content(
+        llms_txt_path,
+        "llms.txt should still be created when llms_txt_full_build is False",
     )
-    assert llms_txt_path.stat().st_size > 0, "llms.txt should not be empty"
 
 
 @pytest.mark.parametrize(
@@ -424,29 +595,18 @@ def test_llms_txt_sitemap_still_created_when_full_disabled(sphinx_build_no_llms_
     ["html", "dirhtml"],
     indirect=True,
 )
-def test_markdown_files_still_created_when_full_disabled(sphinx_build_no_llms_full):
+def test_markdown_files_still_created_when_full_disabled(
+    sphinx_build_no_llms_full, rst_files
+):
     """Test that per-page markdown files are still created when llms-full.txt is disabled."""
-    app, build_dir, source_dir = sphinx_build_no_llms_full
-
-    rst_files = list(source_dir.rglob("*.rst"))
-    assert len(rst_files) > 0, "No RST files found in source directory"
-
-    for rst_file in rst_files:
-        rel_path = rst_file.relative_to(source_dir)
-
-        if app.builder.name == "html":
-            md_path = build_dir / rel_path.with_suffix(".html.md")
-        elif rel_path.stem == "index":
-            if rel_path.parent == Path("."):
-                md_path = build_dir / "index.html.md"
-            else:
-                md_path = build_dir / rel_path.parent / "index.html.md"
-        else:
-            md_path = build_dir / rel_path.with_suffix("") / "index.html.md"
+    app, build_dir, _ = sphinx_build_no_llms_full
+    outputs = get_output_files(build_dir)
 
-        assert md_path.exists(), (
-            f"Markdown file should still be created when llms-full.txt is disabled: {md_path}"
-        )
+    for rel_path in rst_files:
+        for md_path in expected_md_paths(app.builder.name, rel_path, "auto"):
+            assert md_path in outputs, (
+                f"Markdown file should still be created when llms-full.txt is disabled: {md_path}"
+            )
 
 
 _LLMS_FULL_FOOTER_PREFIX = "For more comprehensive documentation, see [llms-full.txt]("
@@ -564,28 +724,25 @@ def test_content_fallback_used_when_no_html_meta(sphinx_build):
         )
 
 
-def test_get_docname_from_md_file(sphinx_build):
+def test_get_docname_from_md_file(sphinx_app, tmp_path):
     """Test that _get_docname_from_md_file returns correct Sphinx docnames."""
-    app, _, _ = sphinx_build
-    generator = MarkdownGenerator(app)
+    generator = MarkdownGenerator(sphinx_app)
     # Simulate a md_build_dir so the helper can be exercised directly
 
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        generator.md_build_dir = tmp_path
+    generator.md_build_dir = tmp_path
 
-        cases = {
-            tmp_path / "index.md": "index",
-            tmp_path / "apples.md": "apples",
-            tmp_path / "nested" / "example.md": "nested/example",
-        }
-        for md_file, expected_docname in cases.items():
-            md_file.parent.mkdir(parents=True, exist_ok=True)
-            md_file.touch()
-            assert generator._get_docname_from_md_file(md_file) == expected_docname
+    cases = {
+        tmp_path / "index.md": "index",
+        tmp_path / "apples.md": "apples",
+        tmp_path / "nested" / "example.md": "nested/example",
+    }
+    for md_file, expected_docname in cases.items():
+        md_file.parent.mkdir(parents=True, exist_ok=True)
+        md_file.touch()
+        assert generator._get_docname_from_md_file(md_file) == expected_docname
 
 
-def test_html_meta_description_used_in_incremental_build():
+def test_html_meta_description_used_in_incremental_build(tmp_path):
     """Test that html_meta descriptions are used even when doctrees are cached.
 
     This covers the case where Sphinx does NOT fire doctree-read for unchanged
@@ -593,67 +750,267 @@ def test_html_meta_description_used_in_incremental_build():
     descriptions only during doctree-read would silently fall back to the
     content-based description in this scenario.
     """
-    docs_source_dir = Path(__file__).parent.parent.parent.parent / "docs" / "source"
-
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        # Both builds share the same outdir, doctreedir, and confoverrides so
-        # Sphinx's incremental environment cache is active for the second build.
-        # (A different outdir, or any changed config value registered with
-        # rebuild="env", triggers a full re-read and defeats the purpose of
-        # this test.  llms_txt_build_parallel=True matches the extension default
-        # to avoid the "config changed" detection.)
-        build_dir = tmp_path / "build"
-        doctree_dir = tmp_path / "doctrees"
-        overrides = {"llms_txt_build_parallel": True}
-
-        # ── First build (fresh) ── populates the doctree pickle cache
-        app1 = Sphinx(
-            srcdir=str(docs_source_dir),
-            confdir=str(docs_source_dir),
-            outdir=str(build_dir),
-            doctreedir=str(doctree_dir),
-            buildername="html",
-            warningiserror=False,
-            freshenv=True,
-            confoverrides=overrides,
-        )
-        app1.build()
-
-        # ── Second build (incremental) ── source unchanged; doctrees served from cache
-        doctree_read_pages: list[str] = []
-        app2 = Sphinx(
-            srcdir=str(docs_source_dir),
-            confdir=str(docs_source_dir),
-            outdir=str(build_dir),
-            doctreedir=str(doctree_dir),
-            buildername="html",
-            warningiserror=False,
-            freshenv=False,
-            confoverrides=overrides,
-        )
-        app2.connect(
-            "doctree-read",
-            lambda a, dt: doctree_read_pages.append(a.env.docname),
-        )
-        app2.build()
 
-        # Confirm we are actually exercising the incremental-build path
-        assert _HTML_META_PAGE not in doctree_read_pages, (
-            f"Expected '{_HTML_META_PAGE}' to be served from doctree cache, "
-            f"but doctree-read fired for it. Incremental build test is not valid."
+    # Both builds share the same outdir, doctreedir, and confoverrides so
+    # Sphinx's incremental environment cache is active for the second build.
+    # (A different outdir, or any changed config value registered with
+    # rebuild="env", triggers a full re-read and defeats the purpose of
+    # this test.  llms_txt_build_parallel=True matches the extension default
+    # to avoid the "config changed" detection.)
+    build_dir = tmp_path / "build"
+    doctree_dir = tmp_path / "doctrees"
+    overrides = {"llms_txt_build_parallel": True}
+
+    # ── First build (fresh) ── populates the doctree pickle cache
+    app1 = Sphinx(
+        srcdir=str(DOCS_SOURCE_DIR),
+        confdir=str(DOCS_SOURCE_DIR),
+        outdir=str(build_dir),
+        doctreedir=str(doctree_dir),
+        buildername="html",
+        status=None,
+        warning=None,
+        freshenv=True,
+        confoverrides=overrides,
+    )
+    app1.build()
+
+    # ── Second build (incremental) ── source unchanged; doctrees served from cache
+    doctree_read_pages: list[str] = []
+    app2 = Sphinx(
+        srcdir=str(DOCS_SOURCE_DIR),
+        confdir=str(DOCS_SOURCE_DIR),
+        outdir=str(build_dir),
+        doctreedir=str(doctree_dir),
+        buildername="html",
+        status=None,
+        warning=None,
+        freshenv=False,
+        confoverrides=overrides,
+    )
+    app2.connect(
+        "doctree-read",
+        lambda a, dt: doctree_read_pages.append(a.env.docname),
+    )
+    app2.build()
+
+    # Confirm we are actually exercising the incremental-build path
+    assert _HTML_META_PAGE not in doctree_read_pages, (
+        f"Expected '{_HTML_META_PAGE}' to be served from doctree cache, "
+        f"but doctree-read fired for it. Incremental build test is not valid."
+    )
+
+    # html_meta description must still appear in llms.txt.
+    # Derive the expected description from the pickled doctree (same source
+    # of truth as the extension) rather than hardcoding the string.
+    expected = _get_html_meta_description(app2, _HTML_META_PAGE)
+    llms_txt = (build_dir / "llms.txt").read_text(encoding="utf-8")
+    meta_lines = [line for line in llms_txt.splitlines() if _HTML_META_PAGE in line]
+    assert meta_lines, f"No llms.txt entry found for page '{_HTML_META_PAGE}'"
+    for line in meta_lines:
+        assert expected in line, (
+            f"html_meta description missing from llms.txt in incremental build.\n"
+            f"Entry:    {line!r}\n"
+            f"Expected: {expected!r}"
         )
 
-        # html_meta description must still appear in llms.txt.
-        # Derive the expected description from the pickled doctree (same source
-        # of truth as the extension) rather than hardcoding the string.
-        expected = _get_html_meta_description(app2, _HTML_META_PAGE)
-        llms_txt = (build_dir / "llms.txt").read_text(encoding="utf-8")
-        meta_lines = [line for line in llms_txt.splitlines() if _HTML_META_PAGE in line]
-        assert meta_lines, f"No llms.txt entry found for page '{_HTML_META_PAGE}'"
-        for line in meta_lines:
-            assert expected in line, (
-                f"html_meta description missing from llms.txt in incremental build.\n"
-                f"Entry:    {line!r}\n"
-                f"Expected: {expected!r}"
-            )
+
+@pytest.fixture
+def docs_copy(tmp_path) -> Path:
+    """A copy of the example docs which tests can edit."""
+    srcdir = tmp_path / "source"
+    shutil.copytree(DOCS_SOURCE_DIR, srcdir)
+    return srcdir
+
+
+@pytest.fixture
+def markdown_builds():
+    """Record the arguments of each markdown build started while the fixture is active.
+
+    ``subprocess.Popen`` is patched for the whole process, so anything else which
+    starts a subprocess is passed straight through without being recorded.
+    """
+    builds = []
+    real_popen = subprocess.Popen
+
+    def popen(args, *popenargs, **kwargs):
+        argv = list(args) if isinstance(args, (list, tuple)) else [args]
+        if any(argv[i : i + 2] == ["-b", "markdown"] for i in range(len(argv))):
+            builds.append(argv)
+        return real_popen(args, *popenargs, **kwargs)
+
+    with patch("sphinx_llm.txt.subprocess.Popen", side_effect=popen):
+        yield builds
+
+
+def test_markdown_build_skipped_when_up_to_date(docs_copy, tmp_path, markdown_builds):
+    """Test that an unchanged rebuild reuses the previous markdown build."""
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+    assert len(markdown_builds) == 1
+    llms_full = (tmp_path / "build" / "llms-full.txt").read_bytes()
+
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    assert len(markdown_builds) == 1
+    assert (tmp_path / "build" / "llms-full.txt").read_bytes() == llms_full
+
+
+def test_markdown_rebuilt_after_source_edit(docs_copy, tmp_path, markdown_builds):
+    """Test that editing a source reruns the markdown build and updates the output."""
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    source = docs_copy / "nested" / "example.rst"
+    source.write_text(source.read_text() + "\nA freshly added sentence.\n")
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    assert len(markdown_builds) == 2
+    output = tmp_path / "build" / "nested" / "example.html.md"
+    assert "A freshly added sentence." in output.read_text()
+
+
+def test_markdown_rebuilt_after_conf_edit(docs_copy, tmp_path, markdown_builds):
+    """Test that editing conf.py reruns the markdown build."""
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    # The copy keeps the original mtime, so bump it past the first build
+    os.utime(docs_copy / "conf.py")
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    assert len(markdown_builds) == 2
+
+
+def test_markdown_rebuilt_with_fresh_env(docs_copy, tmp_path, markdown_builds):
+    """Test that a fresh environment, as with -E, rebuilds every markdown file."""
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+
+    _build_sphinx("html", tmp_path, srcdir=docs_copy, freshenv=True)
+
+    assert len(markdown_builds) == 2
+    assert "-E" in markdown_builds[-1]
+
+
+def test_sequential_markdown_build(docs_copy, tmp_path, markdown_builds):
+    """Test the markdown build run after the primary build, from a fresh environment."""
+    app, build_dir, _ = _build_sphinx(
+        "html", tmp_path, {"llms_txt_build_parallel": False}, srcdir=docs_copy
+    )
+
+    [argv] = markdown_builds
+    # The primary build has finished, so its environment is reused
+    assert argv[argv.index("-d") + 1] == str(app.doctreedir)
+    assert "-a" in argv
+    assert "-E" not in argv
+    assert_file_exists_with_content(build_dir / "apples.html.md")
+    assert_file_exists_with_content(build_dir / "llms.txt")
+
+
+def test_removed_docs_are_not_copied(docs_copy, tmp_path, markdown_builds):
+    """Test that markdown left over from a removed document isn't copied."""
+    doctree_dir = tmp_path / "doctrees"
+    _build_sphinx("html", tmp_path / "first", doctree_dir=doctree_dir, srcdir=docs_copy)
+
+    (docs_copy / "meta_example.rst").unlink()
+    _, build_dir, _ = _build_sphinx(
+        "html", tmp_path / "second", doctree_dir=doctree_dir, srcdir=docs_copy
+    )
+
+    # The stale markdown is still in the kept markdown build
+    assert (doctree_dir / "_markdown_build" / "meta_example.md").exists()
+    assert not (build_dir / "meta_example.html.md").exists()
+    assert (build_dir / "apples.html.md").exists()
+    assert "meta_example" not in (build_dir / "llms.txt").read_text()
+
+
+def test_markdown_rebuilt_when_sources_change_during_build(
+    docs_copy, tmp_path, markdown_builds
+):
+    """Test that sources rewritten during the build, as docref does, aren't missed."""
+    source = docs_copy / "nested" / "example.rst"
+
+    def rewrite_source(app, env):
+        source.write_text(source.read_text() + "\nWritten during the build.\n")
+
+    app = Sphinx(
+        srcdir=str(docs_copy),
+        confdir=str(docs_copy),
+        outdir=str(tmp_path / "build"),
+        doctreedir=str(tmp_path / "doctrees"),
+        buildername="html",
+        status=None,
+        warning=None,
+    )
+    app.connect("env-updated", rewrite_source)
+    app.build()
+
+    assert len(markdown_builds) == 2
+    output = tmp_path / "build" / "nested" / "example.html.md"
+    assert "Written during the build." in output.read_text()
+
+
+def test_skipped_markdown_build_rerun_when_sources_change_during_build(
+    docs_copy, tmp_path, markdown_builds
+):
+    """Test that a markdown build skipped as up to date still sees rewritten sources."""
+    _build_sphinx("html", tmp_path, srcdir=docs_copy)
+    source = docs_copy / "nested" / "example.rst"
+
+    def rewrite_source(app, env):
+        source.write_text(source.read_text() + "\nWritten during the build.\n")
+
+    app = Sphinx(
+        srcdir=str(docs_copy),
+        confdir=str(docs_copy),
+        outdir=str(tmp_path / "build"),
+        doctreedir=str(tmp_path / "doctrees"),
+        buildername="html",
+        status=None,
+        warning=None,
+    )
+    app.connect("env-updated", rewrite_source)
+    app.build()
+
+    assert len(markdown_builds) == 2
+    output = tmp_path / "build" / "nested" / "example.html.md"
+    assert "Written during the build." in output.read_text()
+
+
+def test_outputs_follow_llms_txt_options_changed_between_builds(
+    tmp_path, rst_files, markdown_builds
+):
+    """Test that changing llms_txt_* options between builds updates the outputs.
+
+    These options don't affect the environment, so the second build neither
+    re-reads the sources nor reruns the markdown build, but the llms.txt outputs
+    must still follow the new values.
+    """
+    _build_sphinx(
+        "dirhtml",
+        tmp_path,
+        {
+            "llms_txt_description": "The first description.",
+            "llms_txt_suffix_mode": "file-suffix",
+        },
+    )
+    _, build_dir, _ = _build_sphinx(
+        "dirhtml",
+        tmp_path,
+        {
+            "llms_txt_description": "The second description.",
+            "llms_txt_suffix_mode": "url-suffix",
+            "llms_txt_build_parallel": False,
+            "llms_txt_full_build": False,
+        },
+    )
+
+    assert len(markdown_builds) == 1
+    llms_txt = (build_dir / "llms.txt").read_bytes()
+    assert b"The second description." in llms_txt
+    assert b"The first description." not in llms_txt
+    assert b"llms-full.txt" not in llms_txt
+
+    outputs = get_output_files(build_dir)
+    links = {url.decode() for _, url in _URL_RE.findall(llms_txt)}
+    for rel_path in rst_files:
+        [url_suffix_md] = expected_md_paths("dirhtml", rel_path, "url-suffix")
+        assert_output_exists_with_content(outputs, url_suffix_md)
+        assert url_suffix_md.as_posix() in links
@@ -7,14 +7,18 @@ This extension hooks into the Sphinx build process to create markdown versions
 of all documents using the sphinx_markdown_builder.
 """
 
+import filecmp
+import os
 import re
 import shutil
 import subprocess
 import sys
 import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import PackageNotFoundError, metadata
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, BinaryIO, Optional, Union
 
 import docutils.nodes
 from sphinx.application import Sphinx
@@ -25,6 +29,150 @@ from .version import __version__
 
 logger = logging.getLogger(__name__)
 
+# File copies are I/O bound, so use more threads than there are CPUs
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Buffer size used when streaming markdown into llms-full.txt
+COPY_BUFSIZE = 1024 * 1024
+
+# Titles and descriptions come from the top of a page, so only read this much
+MARKDOWN_HEAD_CHARS = 8192
+
+# Markdown files for index pages, which are listed before all other pages
+INDEX_MARKDOWN_NAMES = frozenset({"index.html.md", "index.md"})
+
+# The first markdown heading in a page, capturing its text without the
+# leading #s or surrounding whitespace. [^\S\n] is whitespace within a line.
+HEADING_RE = re.compile(r"^[^\S\n]*#+[^\S\n]*(.*?)[^\S\n]*$", re.MULTILINE)
+
+# Lines which can describe a page: anything substantial (more than 10
+# characters) which is not a heading, HTML comment, empty anchor or directive
+DESCRIPTION_LINE_RE = re.compile(
+    r"(?!#|<!--|-->|\.\.|<a\b[^>]*>\s*</a>$).{11,}", re.IGNORECASE
+)
+
+# Suffix mode → function choosing (all targets, primary target) from the
+# file-suffix and URL-suffix targets. The "replace" mode has its own paths.
+SUFFIX_TARGET_SELECTORS = {
+    "file-suffix": lambda file_target, url_target: ([file_target], file_target),
+    "url-suffix": lambda file_target, url_target: ([url_target], url_target),
+    # Use file-suffix as primary (spec-compliant)
+    "auto": lambda file_target, url_target: ([file_target, url_target], file_target),
+}
+
+
+def _scandir_markdown(root: Path) -> Iterator[tuple[Path, os.DirEntry]]:
+    """Yield ``(relative path, DirEntry)`` for every markdown file under ``root``.
+
+    Uses ``os.scandir`` so file types come from the directory listing itself
+    rather than a ``stat`` call per entry, and only builds ``Path`` objects for
+    the markdown files that are actually yielded.
+    """
+    prefix_len = len(os.path.join(str(root), ""))
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md") and entry.is_file():
+                    yield Path(entry.path[prefix_len:]), entry
+
+
+def _copy_if_changed(src: os.DirEntry, dst: Path) -> None:
+    """Copy ``src`` to ``dst`` unless a previous build already copied it there.
+
+    ``shutil.copy2`` preserves mtimes, so a destination with the same size and
+    an mtime at least as new as the source is taken to be unchanged.
+    """
+    src_stat = src.stat()
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        pass
+    else:
+        if (
+            dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime >= src_stat.st_mtime
+        ):
+            return
+    shutil.copy2(src.path, dst)
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard link ``dst`` to ``src``, copying instead where links are unsupported."""
+    try:
+        if os.path.samefile(src, dst):
+            return
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _copy_to_targets(src: os.DirEntry, primary: Path, others: list[Path]) -> None:
+    """Copy ``src`` to its ``primary`` target and link the ``others`` to that copy.
+
+    The primary target is a real copy so that the published files never share
+    data with the markdown build, which rewrites its outputs in place.
+    """
+    _copy_if_changed(src, primary)
+    for target in others:
+        _link_or_copy(primary, target)
+
+
+def _append_file(path: Path, out: BinaryIO) -> None:
+    """Append the contents of ``path`` to the binary file ``out``.
+
+    Where the platform supports it ``os.sendfile`` copies the data inside the
+    kernel, otherwise it is streamed through ``shutil.copyfileobj``.
+    """
+    with open(path, "rb") as f:
+        offset = 0
+        if hasattr(os, "sendfile"):
+            # sendfile writes at the descriptor's position, bypassing the buffer
+            out.flush()
+            remaining = os.fstat(f.fileno()).st_size
+            try:
+                while remaining:
+                    sent = os.sendfile(out.fileno(), f.fileno(), offset, remaining)
+                    if not sent:
+                        break
+                    offset += sent
+                    remaining -= sent
+                else:
+                    return
+            except OSError:
+                # e.g. macOS, which only supports sending to sockets
+                pass
+        f.seek(offset)
+        shutil.copyfileobj(f, out, COPY_BUFSIZE)
+
+
+def _write_if_changed(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` unless the file already contains it."""
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except FileNotFoundError:
+        pass
+    path.write_text(text, encoding="utf-8")
+
+
+def _replace_if_changed(new_file: Path, path: Path) -> None:
+    """Move ``new_file`` over ``path`` unless their contents already match.
+
+    This leaves the mtime of unchanged outputs alone, so that incremental
+    builds do not appear to have rewritten them.
+    """
+    if path.exists() and filecmp.cmp(new_file, path, shallow=False):
+        new_file.unlink()
+    else:
+        os.replace(new_file, path)
+
 
 class MarkdownGenerator:
     """Generates markdown files using sphinx_markdown_builder."""
@@ -33,12 +181,14 @@ class MarkdownGenerator:
         self.app = app
         self.generated_markdown_files = []  # Track generated markdown files
         self._docname_by_output_file: dict[Path, str] = {}  # output file → docname
+        self._md_cache: dict[Path, str] = {}  # output file → head of its markdown
         self.outdir = None
         self.md_build_dir = None
         self.md_build_process = None
-        self.md_build_logfile = tempfile.NamedTemporaryFile(
-            mode="w", delete=False, prefix="sphinx_llm_output_", suffix=".log"
-        )
+        self.md_build_up_to_date = False
+        self.md_build_logfile = None  # Created when the markdown build starts
+        self.md_build_started = None  # mtime of the log file, on the sources' clock
+        self.fresh_env = False
         self.parallel = None
 
     def setup(self):
@@ -54,8 +204,13 @@ class MarkdownGenerator:
             return
 
         self.outdir = Path(app.builder.outdir)
-        self.md_build_dir = self.outdir / "_markdown_build"
+        # Keep the markdown build alongside the doctrees rather than in the
+        # output directory, so that it can be reused by the next build
+        self.md_build_dir = Path(app.doctreedir) / "_markdown_build"
         self.parallel = getattr(self.app.config, "llms_txt_build_parallel", True)
+        # Nothing has been read yet, so an empty environment means this build
+        # starts from scratch, e.g. with -E or after the environment was discarded
+        self.fresh_env = not app.env.all_docs
         self.suffix_mode = getattr(self.app.config, "llms_txt_suffix_mode", "auto")
 
         # Backward compatibility: treat "both" as "auto"
@@ -96,11 +251,46 @@ class MarkdownGenerator:
             logger.warning("Skipping build combination due to build error")
             return
 
+        if (
+            self.md_build_up_to_date
+            and self.parallel
+            and not self._markdown_is_up_to_date()
+        ):
+            # The markdown build was skipped before the primary build, during
+            # which extensions such as docref can rewrite sources
+            logger.info("Sources changed during the build, rebuilding markdown files")
+            self.md_build_up_to_date = False
+            self.start_markdown_build()
+
+        if self.md_build_up_to_date:
+            logger.info("Markdown files are up to date, skipping markdown build")
+        elif not self.wait_for_markdown_build():
+            return
+        elif self.parallel and self._sources_changed_since(self.md_build_started):
+            # Extensions such as docref can rewrite sources during the primary
+            # build, after the parallel markdown build may have read them
+            logger.info("Sources changed during the build, rebuilding markdown files")
+            self.start_markdown_build()
+            if not self.wait_for_markdown_build():
+                return
+
+        # Copy markdown files to the main output directory
+        self.copy_markdown_files()
+
+        # Concatenate all markdown files into llms-full.txt
+        if getattr(self.app.config, "llms_txt_full_build", True):
+            self.build_llms_full_txt()
+
+        # Create sitemap in llms.txt
+        self.create_sitemap()
+
+    def wait_for_markdown_build(self) -> bool:
+        """Wait for the markdown build subprocess and return whether it succeeded."""
         if not self.md_build_process:
             logger.warning(
                 "Markdown build process not found, skipping build output combination"
             )
-            return
+            return False
 
         if self.md_build_process.poll() is None:
             logger.info("Waiting for markdown build subprocess to finish...")
@@ -113,26 +303,81 @@ class MarkdownGenerator:
             )
             with open(self.md_build_logfile.name, encoding="utf-8") as logfile:
                 logger.error(logfile.read())
-            return
+            return False
+
+        # The build output is only kept around to diagnose failures
+        os.unlink(self.md_build_logfile.name)
+        return True
+
+    def _source_paths(self, docname: str) -> list[str]:
+        """Return the source of a document and the files it depends on."""
+        env = self.app.env
+        sources = [env.doc2path(docname), *env.dependencies.get(docname, ())]
+        # Dependencies may be recorded relative to the source directory
+        return [os.path.join(self.app.srcdir, source) for source in sources]
 
+    def _sources_changed_since(self, timestamp: float) -> bool:
+        """Check whether any source has been modified since ``timestamp``."""
         try:
-            # Copy markdown files to the main output directory
-            self.copy_markdown_files()
+            return any(
+                os.stat(source).st_mtime >= timestamp
+                for docname in self.app.env.found_docs
+                for source in self._source_paths(docname)
+            )
+        except OSError:
+            return True
 
-            # Concatenate all markdown files into llms-full.txt
-            if getattr(self.app.config, "llms_txt_full_build", True):
-                self.build_llms_full_txt()
+    def _markdown_is_up_to_date(self) -> bool:
+        """Check whether the previous markdown build is newer than every source.
 
-            # Create sitemap in llms.txt
-            self.create_sitemap()
-        finally:
-            # Clean up temporary build directory
-            if self.md_build_dir.exists():
-                shutil.rmtree(self.md_build_dir)
+        Like the markdown builder's own check this compares the mtime of each
+        document's output with its source, but it also considers included files
+        and ``conf.py`` so that the subprocess can be skipped entirely.
+        """
+        env = self.app.env
+        if self.fresh_env or not env.all_docs:
+            # Fresh environment, so everything is rebuilt and there are no
+            # recorded dependencies to check
+            return False
+
+        # Rescan the source directory so that added documents are noticed
+        env.find_files(self.app.config, self.app.builder)
+        conf_py = Path(self.app.confdir or self.app.srcdir, "conf.py")
+        try:
+            conf_mtime = conf_py.stat().st_mtime if conf_py.exists() else 0
+            for docname in env.found_docs:
+                target_mtime = os.stat(self.md_build_dir / f"{docname}.md").st_mtime
+                if conf_mtime > target_mtime:
+                    return False
+                for source in self._source_paths(docname):
+                    if os.stat(source).st_mtime > target_mtime:
+                        return False
+        except OSError:
+            return False
+        return True
 
     def build_markdown_files(self, *_):
-        # Create temporary markdown build directory
-        self.md_build_dir.mkdir(exist_ok=True)
+        self.md_build_up_to_date = self._markdown_is_up_to_date()
+        if self.md_build_up_to_date:
+            return
+        self.start_markdown_build(fresh=self.fresh_env)
+
+    def start_markdown_build(self, fresh: bool = False):
+        """Start ``sphinx-build -b markdown`` in a subprocess, rebuilding all if ``fresh``."""
+        # Create markdown build directory
+        self.md_build_dir.mkdir(parents=True, exist_ok=True)
+        self.md_build_logfile = tempfile.NamedTemporaryFile(
+            mode="w", delete=False, prefix="sphinx_llm_output_", suffix=".log"
+        )
+        self.md_build_started = os.stat(self.md_build_logfile.name).st_mtime
+
+        # When building sequentially we can reuse the doctree directory from the primary build
+        # but in parallel builds these may clobber each other so we need to use a separate one
+        if self.parallel:
+            doctreedir = self.md_build_dir / ".doctrees"
+        else:
+            doctreedir = Path(self.app.doctreedir)
+
         try:
             # Build markdown files using sphinx-markdown-builder
             sphinx_build_cmd = [
@@ -143,13 +388,13 @@ class MarkdownGenerator:
                 "markdown",
                 str(self.app.srcdir),
                 str(self.md_build_dir),
+                "-d",
+                str(doctreedir),
             ]
-
-            # When building sequentially we can reuse the doctree directory from the primary build
-            # but in parallel builds these may clobber each other so we need to use a separate one
-            if not self.parallel:
-                sphinx_build_cmd.append("-d")
-                sphinx_build_cmd.append(str(self.app.doctreedir))
+            if fresh:
+                # A parallel build has its own environment to discard, while a
+                # sequential one shares the primary build's freshly read one
+                sphinx_build_cmd.append("-E" if self.parallel else "-a")
 
             logger.info(
                 f"Spawning additional sphinx subprocess to build markdown files for llms.txt: {' '.join(sphinx_build_cmd)}"
@@ -178,16 +423,13 @@ class MarkdownGenerator:
         Returns:
             Tuple of (list of all targets, primary target)
         """
-        if self.suffix_mode == "file-suffix":
-            return [file_suffix_target], file_suffix_target
-        elif self.suffix_mode == "url-suffix":
-            return [url_suffix_target], url_suffix_target
-        elif self.suffix_mode == "auto":
-            # Use file-suffix as primary (spec-compliant)
-            return [file_suffix_target, url_suffix_target], file_suffix_target
-        raise ExtensionError(
-            f"Unhandled suffix mode in _determine_suffix_targets: {self.suffix_mode!r}"
-        )
+        try:
+            select_targets = SUFFIX_TARGET_SELECTORS[self.suffix_mode]
+        except KeyError:
+            raise ExtensionError(
+                f"Unhandled suffix mode in _determine_suffix_targets: {self.suffix_mode!r}"
+            ) from None
+        return select_targets(file_suffix_target, url_suffix_target)
 
     def _get_dirhtml_root_index_targets(self, new_name: str) -> tuple[list[Path], Path]:
         """Get targets for root index file in dirhtml builder."""
@@ -215,48 +457,45 @@ class MarkdownGenerator:
 
     def _get_dirhtml_non_index_targets(self, rel_path: Path) -> tuple[list[Path], Path]:
         """Get targets for non-index file in dirhtml builder."""
+        page_dir = self.outdir / rel_path.with_suffix("")
         if self.suffix_mode == "replace":
-            replace_target = self.outdir / rel_path.with_suffix("") / "index.md"
+            replace_target = page_dir / "index.md"
             return [replace_target], replace_target
 
-        file_suffix_target = self.outdir / rel_path.with_suffix("") / "index.html.md"
-        url_suffix_target = self.outdir / rel_path.with_suffix(".md")
+        file_suffix_target = page_dir / "index.html.md"
+        url_suffix_target = self.outdir / rel_path  # rel_path is already page.md
         return self._determine_suffix_targets(file_suffix_target, url_suffix_target)
 
     def _get_html_targets(
         self, rel_path: Path, base_name: str, new_name: str
     ) -> tuple[list[Path], Path]:
         """Get targets for html builder."""
+        # Joining a top-level file's parent of "." leaves the outdir unchanged
+        target_dir = self.outdir / rel_path.parent
         if self.suffix_mode == "replace":
             # Replace mode: foo.md (replace .html with .md)
-            replace_target = (
-                self.outdir / rel_path.parent / f"{base_name}.md"
-                if rel_path.parent != Path(".")
-                else self.outdir / f"{base_name}.md"
-            )
+            replace_target = target_dir / f"{base_name}.md"
             return [replace_target], replace_target
 
         # Default behavior: foo.html.md
-        target_file = (
-            self.outdir / rel_path.parent / new_name
-            if rel_path.parent != Path(".")
-            else self.outdir / new_name
-        )
+        target_file = target_dir / new_name
         return [target_file], target_file
 
-    def _get_target_paths(self, md_file: Path) -> tuple[list[Path], Path]:
+    def _get_target_paths(self, rel_path: Path) -> tuple[list[Path], Path]:
         """Determine target file locations based on builder and file type.
 
+        ``rel_path`` is the markdown file's path relative to the markdown build
+        directory.
+
         Returns:
             Tuple of (list of all target files, primary target for llms-full.txt)
         """
-        rel_path = md_file.relative_to(self.md_build_dir)
         base_name = rel_path.stem
         new_name = f"{base_name}.html.md"
 
         if self.app.builder and self.app.builder.name == "dirhtml":
             # dirhtml builder has special handling for index files
-            if base_name == "index" and rel_path.parent == Path("."):
+            if base_name == "index" and len(rel_path.parts) == 1:
                 return self._get_dirhtml_root_index_targets(new_name)
             elif base_name == "index":
                 return self._get_dirhtml_nested_index_targets(rel_path, new_name)
@@ -268,41 +507,59 @@ class MarkdownGenerator:
 
     def copy_markdown_files(self):
         """Copy markdown files from build directory to output directory."""
-        md_files = list(self.md_build_dir.rglob("*.md"))
         self.generated_markdown_files = []
         self._docname_by_output_file = {}
+        self._md_cache = {}
+        copies = []
+        found_docs = self.app.env.found_docs
 
-        for md_file in md_files:
-            target_files, primary_target = self._get_target_paths(md_file)
-            docname = self._get_docname_from_md_file(md_file)
+        for rel_path, md_entry in _scandir_markdown(self.md_build_dir):
+            docname = self._get_docname_from_md_file(Path(md_entry.path))
+            if docname not in found_docs:
+                # Left over from a document which has since been removed
+                continue
+            target_files, primary_target = self._get_target_paths(rel_path)
 
             # Copy the file to all target locations
-            for target_file in target_files:
-                target_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(md_file, target_file)
+            others = [target for target in target_files if target != primary_target]
+            copies.append((md_entry, primary_target, others))
 
             # Only add the primary target to avoid duplicates in llms-full.txt
             if primary_target:
                 self.generated_markdown_files.append(primary_target)
                 self._docname_by_output_file[primary_target] = docname
 
+        # Sort files once to ensure index.html.md comes first in both llms.txt
+        # and llms-full.txt
+        self.generated_markdown_files.sort(
+            key=lambda x: (x.name not in INDEX_MARKDOWN_NAMES, x.name)
+        )
+
+        # Create each destination directory once, then copy the files concurrently
+        parents = set()
+        for _, primary_target, others in copies:
+            parents.add(primary_target.parent)
+            parents.update(target.parent for target in others)
+        for parent in parents:
+            parent.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+            # Consume the results so that any copy errors are raised here
+            list(pool.map(lambda copy: _copy_to_targets(*copy), copies))
+
         logger.info(f"Generated {len(self.generated_markdown_files)} context files")
 
     def build_llms_full_txt(self):
         # Concatenate all markdown files into llms-full.txt
         llms_txt_path = self.outdir / "llms-full.txt"
-        with open(llms_txt_path, "w", encoding="utf-8") as llms_txt:
-            # Sort files to ensure index.html.md comes first
-            sorted_files = sorted(
-                self.generated_markdown_files,
-                key=lambda x: (x.name not in ("index.html.md", "index.md"), x.name),
-            )
-
-            for md_file in sorted_files:
-                with open(md_file, encoding="utf-8") as f:
-                    llms_txt.write(f"# {md_file.name}\n\n")
-                    llms_txt.write(f.read())
-                    llms_txt.write("\n\n")
+        new_llms_txt_path = llms_txt_path.with_name("llms-full.txt.new")
+        # The files are already UTF-8 so stream their bytes straight through
+        # rather than decoding and re-encoding every page
+        with open(new_llms_txt_path, "wb", buffering=COPY_BUFSIZE) as llms_txt:
+            for md_file in self.generated_markdown_files:
+                llms_txt.write(f"# {md_file.name}\n\n".encode())
+                _append_file(md_file, llms_txt)
+                llms_txt.write(b"\n\n")
+        _replace_if_changed(new_llms_txt_path, llms_txt_path)
         logger.info(f"Concatenated full context into: {llms_txt_path}")
 
     def get_project_description(self) -> str:
@@ -330,86 +587,86 @@ class MarkdownGenerator:
         """Create a markdown sitemap in llms.txt."""
         llms_txt_path = self.outdir / "llms.txt"
 
-        with open(llms_txt_path, "w", encoding="utf-8") as sitemap:
-            # Write the title
-            project_title = getattr(self.app.config, "project", "Documentation")
-            sitemap.write(f"# {project_title}\n\n")
+        # Collect the sitemap in memory and write it out in one go
+        sitemap = []
 
-            # Add description
-            for line in self.get_project_description().strip().split("\n"):
-                sitemap.write(f"> {line}\n")
-            sitemap.write("\n\n")
-
-            # Add project details if available
-            if hasattr(self.app.config, "copyright") and self.app.config.copyright:
-                sitemap.write(f"{self.app.config.copyright}\n\n")
-
-            # Write the main content section
-            sitemap.write("## Pages\n\n")
+        # Write the title
+        project_title = getattr(self.app.config, "project", "Documentation")
+        sitemap.append(f"# {project_title}\n\n")
+
+        # Add description
+        for line in self.get_project_description().strip().split("\n"):
+            sitemap.append(f"> {line}\n")
+        sitemap.append("\n\n")
+
+        # Add project details if available
+        if hasattr(self.app.config, "copyright") and self.app.config.copyright:
+            sitemap.append(f"{self.app.config.copyright}\n\n")
+
+        # Write the main content section
+        sitemap.append("## Pages\n\n")
+
+        # Read markdown_http_base from raw conf.py values, so it works
+        # even when sphinx_markdown_builder is not listed in extensions
+        # (it is only loaded in the markdown subprocess build).
+        http_base = (
+            self.app.config._raw_config.get("markdown_http_base")
+            or getattr(self.app.config, "markdown_http_base", "")
+        ).rstrip("/")
+
+        for md_file in self.generated_markdown_files:
+            # Extract title from the markdown file
+            title = self.extract_title_from_markdown(md_file)
+
+            # Create the URL based either on
+            # - the relative path from output directory, or
+            # - markdown_http_base + the relative path
+            rel_path = md_file.relative_to(self.outdir)
+            if http_base:
+                url = f"{http_base}/{rel_path}"
+            else:
+                url = str(rel_path)
 
-            # Sort files to ensure index.html.md comes first
-            sorted_files = sorted(
-                self.generated_markdown_files,
-                key=lambda x: (x.name not in ("index.html.md", "index.md"), x.name),
+            # Write the link
+            sitemap.append(
+                f"- [{title}]({url}): {self.get_page_description(md_file)}\n"
             )
 
-            # Read markdown_http_base from raw conf.py values, so it works
-            # even when sphinx_markdown_builder is not listed in extensions
-            # (it is only loaded in the markdown subprocess build).
-            http_base = (
-                self.app.config._raw_config.get("markdown_http_base")
-                or getattr(self.app.config, "markdown_http_base", "")
-            ).rstrip("/")
-
-            for md_file in sorted_files:
-                # Extract title from the markdown file
-                title = self.extract_title_from_markdown(md_file)
-
-                # Create the URL based either on
-                # - the relative path from output directory, or
-                # - markdown_http_base + the relative path
-                rel_path = md_file.relative_to(self.outdir)
-                if http_base:
-                    url = f"{http_base}/{rel_path}"
-                else:
-                    url = str(rel_path)
-
-                # Write the link
-                sitemap.write(
-                    f"- [{title}]({url}): {self.get_page_description(md_file)}\n"
-                )
+        # Link to llms-full.txt when it was also generated
+        if getattr(self.app.config, "llms_txt_full_build", True):
+            if http_base:
+                full_url = f"{http_base}/llms-full.txt"
+            else:
+                full_url = "llms-full.txt"
+            sitemap.append(
+                f"\n---\n\nFor more comprehensive documentation, see [llms-full.txt]({full_url})\n"
+            )
 
-            # Link to llms-full.txt when it was also generated
-            if getattr(self.app.config, "llms_txt_full_build", True):
-                if http_base:
-                    full_url = f"{http_base}/llms-full.txt"
-                else:
-                    full_url = "llms-full.txt"
-                sitemap.write(
-                    f"\n---\n\nFor more comprehensive documentation, see [llms-full.txt]({full_url})\n"
-                )
+        _write_if_changed(llms_txt_path, "".join(sitemap))
+        logger.info(f"Created llms.txt sitemap: {llms_txt_path}")
 
-            logger.info(f"Created llms.txt sitemap: {llms_txt_path}")
+    def _read_markdown_head(self, md_file: Path) -> str:
+        """Return the start of a generated markdown file, reading it at most once."""
+        head = self._md_cache.get(md_file)
+        if head is None:
+            with open(md_file, encoding="utf-8") as f:
+                head = f.read(MARKDOWN_HEAD_CHARS)
+            self._md_cache[md_file] = head
+        return head
 
     def extract_title_from_markdown(self, md_file: Path) -> str:
         """Extract the title from a markdown file."""
         try:
-            with open(md_file, encoding="utf-8") as f:
-                content = f.read()
-                lines = content.split("\n")
-
-                # Look for the first heading (starts with #)
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("#"):
-                        title = line.lstrip("#").strip()
-                        return title
-
-                # If no heading found, try to get title from filename
-                base_name = md_file.stem.replace(".html", "")
-                if base_name == "index":
-                    return "Home"
-                return base_name.replace("_", " ").title()
+            # Look for the first heading (starts with #)
+            heading = HEADING_RE.search(self._read_markdown_head(md_file))
+            if heading:
+                return heading.group(1)
+
+            # If no heading found, try to get title from filename
+            base_name = md_file.stem.replace(".html", "")
+            if base_name == "index":
+                return "Home"
+            return base_name.replace("_", " ").title()
         except Exception:
             # Fallback to filename without extension
             base_name = md_file.stem.replace(".html", "")
@@ -444,44 +701,41 @@ class MarkdownGenerator:
                     docname,
                 )
 
-        return self.extract_description_from_markdown(md_file)
+        return self.extract_description_from_markdown(
+            md_file, self._md_cache.get(md_file)
+        )
 
     @staticmethod
-    def extract_description_from_markdown(md_file: Path) -> str:
+    def extract_description_from_markdown(
+        md_file: Path, content: Optional[str] = None
+    ) -> str:
         """Extract a content-based description from a markdown file.
 
         Returns the first 100 characters of the first meaningful paragraph,
-        or a filename-based fallback if no suitable paragraph is found.
+        or a filename-based fallback if no suitable paragraph is found. Only the
+        start of the file is scanned; if ``content`` has already been read it is
+        used instead of reading the file again.
         """
         try:
-            with open(md_file, encoding="utf-8") as f:
-                content = f.read()
-                lines = content.split("\n")
-                anchor = re.compile(r"^<a\b[^>]*>\s*</a>$", re.IGNORECASE)
-
-                # Skip HTML comments and look for the first meaningful paragraph
-                for line in lines:
-                    line = line.strip()
-                    # Skip empty lines, headings, anchors, and HTML comments
-                    if (
-                        line
-                        and not line.startswith("#")
-                        and not line.startswith("<!--")
-                        and not line.startswith("-->")
-                        and not line.startswith("..")
-                        and not anchor.match(line)
-                        and len(line) > 10
-                    ):  # Ensure it's substantial content
-                        return line[:100] + "..." if len(line) > 100 else line
-
-                # Fallback descriptions based on filename
-                base_name = md_file.stem.replace(".html", "")
-                if base_name == "index":
-                    return "Main documentation page"
-                elif base_name == "test":
-                    return "Testing and example page"
-                else:
-                    return "Page content"
+            if content is None:
+                with open(md_file, encoding="utf-8") as f:
+                    content = f.read(MARKDOWN_HEAD_CHARS)
+            lines = content.split("\n")
+
+            # Skip HTML comments and look for the first meaningful paragraph
+            for line in lines:
+                line = line.strip()
+                if DESCRIPTION_LINE_RE.match(line):
+                    return line[:100] + "..." if len(line) > 100 else line
+
+            # Fallback descriptions based on filename
+            base_name = md_file.stem.replace(".html", "")
+            if base_name == "index":
+                return "Main documentation page"
+            elif base_name == "test":
+                return "Testing and example page"
+            else:
+                return "Page content"
         except Exception:
             # Fallback descriptions based on filename
             base_name = md_file.stem.replace(".html", "")
@@ -496,10 +750,10 @@ class MarkdownGenerator:
 def setup(app: Sphinx) -> dict[str, Any]:
     """Set up the Sphinx extension."""
     app.add_config_value("llms_txt_enabled", True, "")
-    app.add_config_value("llms_txt_description", "", "env")
-    app.add_config_value("llms_txt_build_parallel", True, "env")
-    app.add_config_value("llms_txt_suffix_mode", "auto", "env")
-    app.add_config_value("llms_txt_full_build", True, "env")
+    app.add_config_value("llms_txt_description", "", "")
+    app.add_config_value("llms_txt_build_parallel", True, "")
+    app.add_config_value("llms_txt_suffix_mode", "auto", "")
+    app.add_config_value("llms_txt_full_build", True, "")
     generator = MarkdownGenerator(app)
     generator.setup()
 